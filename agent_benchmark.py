@@ -0,0 +1,655 @@
+"""
+Offline benchmarks for the agent scripts, driven by the scripted models in mock_model.py.
+
+For every scenario this reports:
+  - overhead: wall time per run with zero-latency models, i.e. what the SDK and our own
+    orchestration cost on top of the model calls
+  - stages: observed latency of each agent's model calls under the configured distribution
+  - allocations: peak and retained memory per run (tracemalloc)
+  - throughput: completed runs per second at each concurrency level
+
+    python agent_benchmark.py                       # run everything and print a table
+    python agent_benchmark.py --save-baseline       # record benchmarks/baseline.json
+    python agent_benchmark.py --compare             # exit 1 if a metric regressed past tolerance
+
+Baselines are machine-specific: record one on the machine that runs --compare.
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from agents import Agent, Model, Runner, SQLiteSession, set_trace_processors, set_tracing_disabled
+
+from mock_model import (
+    Latency,
+    MockModel,
+    ProviderLimit,
+    constant,
+    handoff_call,
+    lognormal,
+    measure_calls,
+    message,
+    structured,
+    tool_call,
+    use_models,
+)
+from model_scheduler import ModelScheduler, Priority, ScheduledModel
+from response_cache import CachingModel, ResponseCache
+from span_metrics import SpanMetricsProcessor, prometheus_text
+from speculative_handoff import SpeculationStats, SpeculativeModel
+from usage_ledger import UsageLedger, record_usage, set_ledger, usage_turn
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+
+
+class BenchOptions:
+    """What to put between the agents and their mock models, and how the mock provider limits them."""
+
+    def __init__(
+        self,
+        cache: bool = False,
+        scheduler_rpm: float | None = None,
+        scheduler_tpm: float | None = None,
+        scheduler_concurrency: int | None = None,
+        provider_rpm: float | None = None,
+        speculative: bool = False,
+    ):
+        self.cache = cache
+        self.scheduler_rpm = scheduler_rpm
+        self.scheduler_tpm = scheduler_tpm
+        self.scheduler_concurrency = scheduler_concurrency
+        self.provider_rpm = provider_rpm
+        self.speculative = speculative
+
+    @property
+    def scheduled(self) -> bool:
+        return any(value is not None for value in (self.scheduler_rpm, self.scheduler_tpm, self.scheduler_concurrency))
+
+
+class Scenario:
+    def __init__(
+        self,
+        name: str,
+        models: list[tuple[Agent[Any], MockModel]],
+        run: Callable[[], Awaitable[Any]],
+        speculative: bool = False,
+    ):
+        self.name = name
+        self.models = models
+        self.run = run
+        # Speculate even without --speculative-handoff, for scenarios that only make sense with it.
+        self.speculative = speculative
+        self.scheduler: ModelScheduler | None = None
+        self.limit: ProviderLimit | None = None
+        self.speculation: SpeculationStats | None = None
+
+    def installed_models(self, options: BenchOptions, load: bool = False) -> list[tuple[Agent[Any], Model]]:
+        """
+        The models to pin on each agent: the mock, behind a fresh scheduler and/or response cache if asked for.
+
+        Rate limits and budgets only apply under `load`; the overhead and allocation passes measure
+        the cost of the scheduler itself rather than its pacing.
+        """
+        # The provider limit is enforced per second so short benchmarks still run into it.
+        self.limit = (
+            ProviderLimit(max(1, round(options.provider_rpm / 60)), per_seconds=1.0)
+            if load and options.provider_rpm
+            else None
+        )
+        self.scheduler = (
+            ModelScheduler(
+                requests_per_minute=options.scheduler_rpm if load else None,
+                tokens_per_minute=options.scheduler_tpm if load else None,
+                max_concurrency=options.scheduler_concurrency or 8,
+                base_backoff=0.05,
+            )
+            if options.scheduled
+            else None
+        )
+        response_cache = ResponseCache(path=None) if options.cache else None
+        self.speculation = SpeculationStats() if options.speculative or self.speculative else None
+
+        installed = []
+        for agent, model in self.models:
+            model.limit = self.limit
+            wrapped: Model = model
+            if self.scheduler is not None:
+                # Keep the priority class the script gave the agent.
+                scheduled = _wrapper(agent.model, ScheduledModel)
+                wrapped = ScheduledModel(wrapped, self.scheduler, scheduled.priority if scheduled else Priority.DEFAULT)
+            if response_cache is not None:
+                wrapped = CachingModel(agent.name, wrapped, response_cache)
+            speculative = _wrapper(agent.model, SpeculativeModel)
+            if speculative is not None:
+                wrapped = SpeculativeModel(agent.name, wrapped, speculative.safe_tools)
+            installed.append((agent, wrapped))
+        return installed
+
+
+def _wrapper(model: Any, cls: type[Model]) -> Any:
+    """The first `cls` in a chain of wrapping models (CachingModel, ScheduledModel, ...)."""
+    while model is not None and not isinstance(model, str):
+        if isinstance(model, cls):
+            return model
+        model = getattr(model, "_model", None)
+    return None
+
+
+### SCENARIOS
+# Each builder mirrors the `main()` of one script, with the interactive input replaced by a fixed
+# message and every agent it touches (including guardrail and agent-as-tool sub-agents) scripted.
+
+
+def tri_agent_scenario(latency: Latency) -> Scenario:
+    import tri_agent
+
+    async def run():
+        return record_usage(await Runner.run(tri_agent.triage_agent, "What is the capital of France?"))
+
+    return Scenario(
+        "tri_agent",
+        [
+            (tri_agent.triage_agent, MockModel("Triage Agent", [[handoff_call(tri_agent.history_tutor_agent)]], latency)),
+            (tri_agent.history_tutor_agent, MockModel("History Tutor", [[message("Paris.")]], latency)),
+        ],
+        run,
+    )
+
+
+def guard_rails_scenario(latency: Latency) -> Scenario:
+    import guard_rails
+
+    async def run():
+        return record_usage(await Runner.run(guard_rails.triage_agent, "Who was the first emperor of Rome?"))
+
+    return Scenario(
+        "guard_rails",
+        [
+            (
+                guard_rails.guardrail_agent,
+                MockModel("Guardrail check", [[structured(is_history_qtn=True, reasoning="Roman history")]], latency),
+            ),
+            (
+                guard_rails.triage_agent,
+                MockModel("Triage Agent", [[handoff_call(guard_rails.history_tutor_agent)]], latency),
+            ),
+            (guard_rails.history_tutor_agent, MockModel("History Tutor", [[message("Augustus.")]], latency)),
+        ],
+        run,
+    )
+
+
+def language_traslator_scenario(latency: Latency) -> Scenario:
+    import language_traslator as lt
+
+    msg = "Translate 'good morning' to Spanish, French and Italian."
+
+    async def run():
+        with usage_turn(uuid.uuid4().hex[:16]):
+            orchestrator_result = record_usage(await Runner.run(lt.orchestrator_agent, msg))
+            return record_usage(await Runner.run(lt.synthesizer_agent, orchestrator_result.to_input_list()))
+
+    return Scenario(
+        "language_traslator",
+        [
+            (
+                lt.orchestrator_agent,
+                MockModel(
+                    "orchestrator_agent",
+                    [
+                        [
+                            tool_call("translate_to_spanish", {"input": msg}),
+                            tool_call("translate_to_french", {"input": msg}),
+                            tool_call("translate_to_italian", {"input": msg}),
+                        ],
+                        [message("Buenos días / Bonjour / Buongiorno")],
+                    ],
+                    latency,
+                ),
+            ),
+            (lt.spanish_agent, MockModel("spanish_agent", [[message("Buenos días")]], latency)),
+            (lt.french_agent, MockModel("french_agent", [[message("Bonjour")]], latency)),
+            (lt.italian_agent, MockModel("italian_agent", [[message("Buongiorno")]], latency)),
+            (
+                lt.guardrail_agent,
+                MockModel("Guardrail check", [[structured(is_listed=True, reasoning="All listed")]], latency),
+            ),
+            (
+                lt.synthesizer_agent,
+                MockModel("synthesizer_agent", [[message("Buenos días, Bonjour, Buongiorno")]], latency),
+            ),
+        ],
+        run,
+    )
+
+
+def flight_faq_scenario(latency: Latency) -> Scenario:
+    import flight_travel_agent as fta
+
+    async def run():
+        input_items = [{"content": "How much baggage can I bring?", "role": "user"}]
+        return record_usage(
+            await fta.run_turn(fta.triage_agent, input_items, fta.AirlineAgentContext(), scenario.speculation)
+        )
+
+    scenario = Scenario(
+        "flight_faq",
+        [
+            (fta.triage_agent, MockModel("Triage Agent", [[handoff_call(fta.faq_agent)]], latency)),
+            (
+                fta.faq_agent,
+                MockModel(
+                    "FAQ Agent",
+                    [[tool_call("faq_lookup_tool", {"question": "baggage"})], [message("One bag under 50 pounds.")]],
+                    latency,
+                ),
+            ),
+        ],
+        run,
+    )
+    return scenario
+
+
+def flight_seat_scenario(latency: Latency) -> Scenario:
+    import flight_travel_agent as fta
+
+    async def run():
+        input_items = [{"content": "Move me to seat 12A, confirmation ABC123.", "role": "user"}]
+        return record_usage(
+            await fta.run_turn(fta.triage_agent, input_items, fta.AirlineAgentContext(), scenario.speculation)
+        )
+
+    scenario = Scenario(
+        "flight_seat",
+        [
+            (fta.triage_agent, MockModel("Triage Agent", [[handoff_call(fta.seat_booking_agent)]], latency)),
+            (
+                fta.seat_booking_agent,
+                MockModel(
+                    "Seat Booking Agent",
+                    [
+                        [tool_call("update_seat", {"confirmation_number": "ABC123", "new_seat": "12A"})],
+                        [message("Your seat is now 12A.")],
+                    ],
+                    latency,
+                ),
+            ),
+        ],
+        run,
+    )
+    return scenario
+
+
+def flight_mispredicted_scenario(latency: Latency) -> Scenario:
+    import flight_travel_agent as fta
+
+    async def run():
+        # Reads like an FAQ question (bags), so speculation starts the FAQ agent, but triage picks seat booking.
+        input_items = [{"content": "Can I keep my bag at my seat? I'd like to move to 12A.", "role": "user"}]
+        return record_usage(
+            await fta.run_turn(fta.triage_agent, input_items, fta.AirlineAgentContext(), scenario.speculation)
+        )
+
+    scenario = Scenario(
+        "flight_mispredicted",
+        [
+            (fta.triage_agent, MockModel("Triage Agent", [[handoff_call(fta.seat_booking_agent)]], latency)),
+            (
+                fta.faq_agent,
+                MockModel(
+                    "FAQ Agent",
+                    [[tool_call("faq_lookup_tool", {"question": "bag"})], [message("One bag under 50 pounds.")]],
+                    latency,
+                ),
+            ),
+            (
+                fta.seat_booking_agent,
+                MockModel("Seat Booking Agent", [[message("What is your confirmation number?")]], latency),
+            ),
+        ],
+        run,
+        # Without speculation this is just another seat turn; the point is the cost of a miss.
+        speculative=True,
+    )
+    return scenario
+
+
+def session_demo_scenario(latency: Latency) -> Scenario:
+    agent = Agent(name="Assistant", instructions="Reply very concisely about the mentioned topic.")
+
+    async def run():
+        # An in-memory session per run, so concurrent runs don't share history.
+        session = SQLiteSession(f"bench_{uuid.uuid4().hex[:16]}")
+        result = None
+        for question in (
+            "Which anime is monkey de luffy from ?",
+            "Who is he in the show?",
+            "What episode is it currently airing?",
+        ):
+            with usage_turn(session.session_id):
+                result = record_usage(await Runner.run(agent, question, session=session))
+        session.close()
+        return result
+
+    return Scenario(
+        "session_demo",
+        [(agent, MockModel("Assistant", [[message("One Piece.")]], latency))],
+        run,
+    )
+
+
+def dynamic_prompt_chats_scenario(latency: Latency) -> Scenario:
+    import dynamic_prompt_chats as dpc
+
+    rng = random.Random(0)
+    user_message = "Tell whats your name and what do you do in your daily life."
+
+    async def run():
+        context = dpc.CustomContext(style=rng.choice(["goku", "luffy", "naruto"]))
+        return record_usage(await Runner.run(dpc.agent, user_message, context=context))
+
+    return Scenario(
+        "dynamic_prompt_chats",
+        [(dpc.agent, MockModel("Chat agent", [[message("I'm Goku! I train every day.")]], latency))],
+        run,
+    )
+
+
+SCENARIOS: dict[str, Callable[[Latency], Scenario]] = {
+    "tri_agent": tri_agent_scenario,
+    "guard_rails": guard_rails_scenario,
+    "language_traslator": language_traslator_scenario,
+    "flight_faq": flight_faq_scenario,
+    "flight_seat": flight_seat_scenario,
+    "flight_mispredicted": flight_mispredicted_scenario,
+    "session_demo": session_demo_scenario,
+    "dynamic_prompt_chats": dynamic_prompt_chats_scenario,
+}
+
+
+### MEASUREMENT
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_ms(values: list[float]) -> dict[str, float]:
+    return {
+        "mean_ms": round(statistics.fmean(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+    }
+
+
+async def timed_runs(scenario: Scenario, runs: int, concurrency: int) -> tuple[list[float], float, int]:
+    """
+    Run the scenario `runs` times with at most `concurrency` in flight.
+
+    Returns the seconds of each successful run, the total seconds and the number of failed runs.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: list[float] = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await scenario.run()
+            except Exception:
+                failures += 1
+                return
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return durations, time.perf_counter() - started, failures
+
+
+async def measure_overhead(name: str, runs: int, options: BenchOptions) -> dict[str, float]:
+    scenario = SCENARIOS[name](constant(0))
+    with use_models(scenario.installed_models(options)):
+        await scenario.run()  # warm up imports, schemas and caches
+        durations, _, _ = await timed_runs(scenario, runs, concurrency=1)
+    return summarize_ms(durations)
+
+
+async def measure_allocations(name: str, runs: int, options: BenchOptions) -> dict[str, float]:
+    scenario = SCENARIOS[name](constant(0))
+    with use_models(scenario.installed_models(options)):
+        await scenario.run()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            for _ in range(runs):
+                await scenario.run()
+            gc.collect()
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        "peak_kib": round((peak - before) / 1024, 1),
+        "retained_kib_per_run": round((after - before) / 1024 / runs, 2),
+    }
+
+
+async def measure_load(
+    name: str, runs: int, concurrency: list[int], latency: Latency, options: BenchOptions
+) -> dict[str, Any]:
+    scenario = SCENARIOS[name](latency)
+    stage_latencies: dict[str, list[float]] = defaultdict(list)
+    throughput: dict[str, dict[str, float]] = {}
+    result: dict[str, Any] = {}
+    with use_models(scenario.installed_models(options, load=True)):
+        for level in concurrency:
+            with measure_calls() as calls:
+                durations, total, failures = await timed_runs(scenario, runs, level)
+            for stage, seconds in calls:
+                stage_latencies[stage].append(seconds)
+            throughput[str(level)] = {
+                "runs_per_s": round((runs - failures) / total, 2),
+                "failures": failures,
+                **summarize_ms(durations),
+            }
+    result["stages"] = {stage: summarize_ms(values) for stage, values in stage_latencies.items()}
+    result["throughput"] = throughput
+    if scenario.scheduler is not None:
+        result["scheduler"] = scenario.scheduler.stats.report()
+    if scenario.limit is not None:
+        result["provider_rejected"] = scenario.limit.rejected
+    if scenario.speculation is not None and scenario.speculation.speculated:
+        result["speculation"] = scenario.speculation.report()
+    return result
+
+
+async def benchmark(
+    names: list[str], runs: int, concurrency: list[int], latency: Latency, options: BenchOptions
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for name in names:
+        load = await measure_load(name, runs, concurrency, latency, options)
+        results[name] = {
+            "overhead": await measure_overhead(name, runs, options),
+            "allocations": await measure_allocations(name, max(1, runs // 5), options),
+            **load,
+        }
+    return results
+
+
+### BASELINES
+
+
+def regressions(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Compare the metrics that should be stable across runs: overhead, memory and throughput."""
+    problems = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            problems.append(f"{name}: no baseline, record one with --save-baseline")
+            continue
+        checks = [
+            ("overhead p50_ms", result["overhead"]["p50_ms"], base["overhead"]["p50_ms"], True),
+            ("allocations peak_kib", result["allocations"]["peak_kib"], base["allocations"]["peak_kib"], True),
+        ]
+        for level, stats in result["throughput"].items():
+            if level in base["throughput"]:
+                checks.append(
+                    (f"throughput@{level} runs_per_s", stats["runs_per_s"], base["throughput"][level]["runs_per_s"], False)
+                )
+        for metric, value, reference, lower_is_better in checks:
+            if reference <= 0:
+                continue
+            change = (value - reference) / reference
+            if (change > tolerance) if lower_is_better else (change < -tolerance):
+                problems.append(f"{name}: {metric} {reference} -> {value} ({change:+.0%})")
+    return problems
+
+
+def print_report(results: dict[str, Any]) -> None:
+    for name, result in results.items():
+        overhead, allocations = result["overhead"], result["allocations"]
+        print(f"\n{name}")
+        print(
+            f"  overhead      p50 {overhead['p50_ms']:.3f} ms  p95 {overhead['p95_ms']:.3f} ms"
+            f"  | peak {allocations['peak_kib']} KiB, retained {allocations['retained_kib_per_run']} KiB/run"
+        )
+        for stage, stats in result["stages"].items():
+            print(f"  stage  {stage:<22} p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms")
+        for level, stats in result["throughput"].items():
+            print(
+                f"  concurrency {level:>3}: {stats['runs_per_s']:>8} runs/s"
+                f"  p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms"
+                + (f"  {stats['failures']} failed" if stats["failures"] else "")
+            )
+        if "provider_rejected" in result:
+            print(f"  provider      {result['provider_rejected']} requests rejected with 429")
+        if "speculation" in result:
+            speculation = result["speculation"]
+            print(
+                f"  speculation   hit rate {speculation['hit_rate']:.0%} ({speculation['hits']}/{speculation['speculated']}),"
+                f" {speculation['saved_ms_per_hit'] or 0:.1f} ms saved per hit,"
+                f" {speculation['wasted_calls']} wasted calls ({speculation['wasted_tokens']} tokens)"
+            )
+        if "scheduler" in result:
+            scheduler = result["scheduler"]
+            print(
+                f"  scheduler     {scheduler['admitted']} admitted, {scheduler['rate_limited']} rate limited,"
+                f" {scheduler['retries']} retried"
+            )
+            for priority, wait in scheduler["queue_wait"].items():
+                print(
+                    f"  queue  {priority:<22} mean {wait['mean_ms']:.1f} ms  p95 {wait['p95_ms']:.1f} ms"
+                    f"  max {wait['max_ms']:.1f} ms"
+                )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="default: all")
+    parser.add_argument("--runs", type=int, default=50, help="runs per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, default=40, help="median simulated model latency")
+    parser.add_argument("--sigma", type=float, default=0.3, help="lognormal spread of the model latency")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    parser.add_argument(
+        "--span-metrics",
+        type=float,
+        metavar="SAMPLE_RATE",
+        help="trace into a local SpanMetricsProcessor to measure its overhead, and print its histograms",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="put an in-memory ResponseCache in front of every mock model",
+    )
+    parser.add_argument("--scheduler-rpm", type=float, help="route model calls through a ModelScheduler with this budget")
+    parser.add_argument("--scheduler-tpm", type=float, help="tokens/minute budget of the ModelScheduler")
+    parser.add_argument("--scheduler-concurrency", type=int, help="concurrent model calls allowed by the ModelScheduler")
+    parser.add_argument("--provider-rpm", type=float, help="make the mock provider answer 429 above this rate")
+    parser.add_argument(
+        "--speculative-handoff",
+        action="store_true",
+        help="start the predicted specialist alongside triage in the flight scenarios",
+    )
+    parser.add_argument("--usage-db", help="record token usage of every run into this UsageLedger database")
+    args = parser.parse_args()
+
+    # Nothing is exported to the hosted dashboard, that would only add noise and need an API key.
+    processor = None
+    if args.span_metrics is not None:
+        processor = SpanMetricsProcessor(sample_rate=args.span_metrics)
+        set_trace_processors([processor])
+    else:
+        set_tracing_disabled(True)
+
+    if args.usage_db:
+        set_ledger(UsageLedger(args.usage_db))
+
+    names = args.scenario or list(SCENARIOS)
+    options = BenchOptions(
+        cache=args.response_cache,
+        scheduler_rpm=args.scheduler_rpm,
+        scheduler_tpm=args.scheduler_tpm,
+        scheduler_concurrency=args.scheduler_concurrency,
+        provider_rpm=args.provider_rpm,
+        speculative=args.speculative_handoff,
+    )
+    latency = lognormal(args.latency_ms, args.sigma) if args.latency_ms > 0 else constant(0)
+    results = asyncio.run(benchmark(names, args.runs, args.concurrency, latency, options))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    if processor is not None:
+        print()
+        print(prometheus_text(processor), end="")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+            return 1
+        with open(args.baseline) as f:
+            problems = regressions(results, json.load(f), args.tolerance)
+        if problems:
+            print("\nRegressions:")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
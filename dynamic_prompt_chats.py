@@ -1,42 +1,45 @@
 import asyncio
 import random
-from typing import Literal
 
 from agents import Agent, RunContextWrapper, Runner
+from model_scheduler import schedule
+from persona_registry import PersonaRegistry
+from response_cache import enable_from_env
+from usage_ledger import record_usage
+
+# Personas live in personas.json; instructions are built once per style at load time.
+personas = PersonaRegistry.load()
 
 
 class CustomContext:
-    def __init__(self, style: Literal["goku", "luffy", "naruto"]):
+    def __init__(self, style: str):
         self.style = style
 
 
 def custom_instructions(
     run_context: RunContextWrapper[CustomContext], agent: Agent[CustomContext]
 ) -> str:
-    context = run_context.context
-    if context.style == "goku":
-        return "Only respond as the anime character goku from anime tv show Dragon Ball Z."
-    elif context.style == "luffy":
-        return "Only respond as the anime character luffy from anime tv show One Piece."
-    else:
-        return "Only respond as the anime character naruto from anime tv show Naruto."
+    return personas.instructions(run_context.context.style)
 
 agent = Agent(
     name="Chat agent",
     instructions=custom_instructions,
 )
 
+schedule(agent)
+
 
 async def main():
-    choiceSelected = input("Hi! Select one of the given ? \m ['goku'', 'luffy', 'naruto'] ")
-    # choice: Literal["goku", "luffy", "naruto"] = random.choice(["goku", "luffy", "naruto"])
-    choice: Literal["goku", "luffy", "naruto"] = choiceSelected
+    enable_from_env(agent)
+    choiceSelected = input(f"Hi! Select one of the given ? {personas.styles} ")
+    # choice = random.choice(personas.styles)
+    choice = choiceSelected
     context = CustomContext(style=choice)
     print(f"Using anime talk style: {choice}\n")
 
     user_message = "Tell whats your name and what do you do in your daily life. Also tell how fight a bad person in your own way."
     print(f"User: {user_message}")
-    result = await Runner.run(agent, user_message, context=context)
+    result = record_usage(await Runner.run(agent, user_message, context=context))
 
     print(f"Assistant: {result.final_output}")
 
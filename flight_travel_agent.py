@@ -1,6 +1,7 @@
 from __future__ import annotations as _annotations
 
 import asyncio
+import os
 import random
 import uuid
 
@@ -21,6 +22,11 @@ from agents import (
     trace,
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
+from model_scheduler import Priority, schedule
+from response_cache import enable_from_env
+from span_metrics import install_from_env
+from speculative_handoff import SpeculationStats, run_speculative, speculate
+from usage_ledger import record_usage, usage_turn
 
 ### CONTEXT
 
@@ -35,10 +41,10 @@ class AirlineAgentContext(BaseModel):
 ### TOOLS
 
 
-@function_tool(
-    name_override="faq_lookup_tool", description_override="Lookup frequently asked questions."
-)
-async def faq_lookup_tool(question: str) -> str:
+FAQ_UNKNOWN = "I'm sorry, I don't know the answer to that question."
+
+
+def faq_answer(question: str) -> str:
     if "bag" in question or "baggage" in question:
         return (
             "You are allowed to bring one bag on the plane. "
@@ -53,7 +59,14 @@ async def faq_lookup_tool(question: str) -> str:
         )
     elif "wifi" in question:
         return "We have free wifi on the plane, join Airline-Wifi"
-    return "I'm sorry, I don't know the answer to that question."
+    return FAQ_UNKNOWN
+
+
+@function_tool(
+    name_override="faq_lookup_tool", description_override="Lookup frequently asked questions."
+)
+async def faq_lookup_tool(question: str) -> str:
+    return faq_answer(question)
 
 
 @function_tool
@@ -128,14 +141,51 @@ triage_agent = Agent[AirlineAgentContext](
 faq_agent.handoffs.append(triage_agent)
 seat_booking_agent.handoffs.append(triage_agent)
 
+schedule(triage_agent, priority=Priority.TRIAGE)
+schedule(faq_agent, seat_booking_agent)
+# faq_lookup_tool only reads, so a speculative FAQ run may call it; update_seat waits for triage.
+speculate(triage_agent, faq_agent, seat_booking_agent, safe_tools=["faq_lookup_tool"])
+
+
+### SPECULATIVE HANDOFF
+
+
+def predict_specialist(input_items: list[TResponseInputItem]) -> Agent[AirlineAgentContext] | None:
+    """Guess triage's handoff from the last user message, without a model call."""
+    question = next(
+        (item["content"] for item in reversed(input_items) if item.get("role") == "user"), ""
+    ).lower()
+    # The FAQ lookup is local and cheap, so use it as the predictor: a question it can answer means
+    # an FAQ turn. Its answer isn't reused; the FAQ agent calls the tool with its own question.
+    if faq_answer(question) != FAQ_UNKNOWN:
+        return faq_agent
+    if "seat" in question or "confirmation" in question:
+        return seat_booking_agent
+    return None
+
+
+async def run_turn(
+    agent: Agent[AirlineAgentContext],
+    input_items: list[TResponseInputItem],
+    context: AirlineAgentContext,
+    speculation: SpeculationStats | None = None,
+):
+    """Run one customer turn, speculating on triage's handoff when `speculation` is given."""
+    if speculation is not None and agent is triage_agent:
+        return await run_speculative(agent, input_items, predict_specialist, context=context, stats=speculation)
+    return await Runner.run(agent, input_items, context=context)
+
 
 ### RUN
 
 
 async def main():
+    install_from_env()
+    enable_from_env(faq_agent)
     current_agent: Agent[AirlineAgentContext] = triage_agent
     input_items: list[TResponseInputItem] = []
     context = AirlineAgentContext()
+    speculation = SpeculationStats() if os.getenv("AGENT_SPECULATIVE_HANDOFF") else None
 
     # Normally, each input from the user would be an API request to your app, and you can wrap the request in a trace()
     # Here, we'll just use a random UUID for the conversation ID
@@ -143,10 +193,10 @@ async def main():
 
     while True:
         user_input = input("Enter your message: ")
-        with trace("Customer service", group_id=conversation_id):
+        with trace("Customer service", group_id=conversation_id), usage_turn(conversation_id):
             print('user_input', user_input)
             input_items.append({"content": user_input, "role": "user"})
-            result = await Runner.run(current_agent, input_items, context=context)
+            result = record_usage(await run_turn(current_agent, input_items, context, speculation))
 
             for new_item in result.new_items:
                 agent_name = new_item.agent.name
@@ -162,6 +212,8 @@ async def main():
                     print(f"{agent_name}: Tool call output: {new_item.output}")
                 else:
                     print(f"{agent_name}: Skipping item: {new_item.__class__.__name__}")
+            if speculation is not None:
+                print(f"Speculative handoff: {speculation.report()}")
             input_items = result.to_input_list()
             current_agent = result.last_agent
 
@@ -3,7 +3,9 @@ import sys
 from agents import Agent, InputGuardrail, GuardrailFunctionOutput, Runner
 from agents.exceptions import InputGuardrailTripwireTriggered
 from pydantic import BaseModel
+from model_scheduler import Priority, schedule
 from tri_agent import history_tutor_agent, math_tutor_agent
+from usage_ledger import record_usage
 
 class HomeworkOutput(BaseModel):
     is_history_qtn: bool
@@ -18,6 +20,7 @@ guardrail_agent = Agent(
 # Only allow questions related to history
 async def history_guardrail(ctx, agent, input_data):
     result = await Runner.run(guardrail_agent, input_data, context=ctx.context)
+    record_usage(result, stage="guardrail:history_guardrail")
     final_output = result.final_output_as(HomeworkOutput)
     return GuardrailFunctionOutput(
         output_info=final_output,
@@ -33,12 +36,15 @@ triage_agent = Agent(
     ],
 )
 
+schedule(guardrail_agent, priority=Priority.GUARDRAIL)
+schedule(triage_agent, priority=Priority.TRIAGE)
+
 if __name__ == "__main__":
     try:
       if len(sys.argv) > 1:
           data = sys.argv[1:] # Get all arguments after the script name
           print(f"Question asked - {data[0]}")
-          result = asyncio.run(Runner.run(triage_agent, data[0]))
+          result = record_usage(asyncio.run(Runner.run(triage_agent, data[0])))
           print(result)
       else:
           print("No data provided via command-line arguments.")
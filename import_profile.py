@@ -0,0 +1,214 @@
+"""
+Import-time profile of the scripts, from `python -X importtime`.
+
+Each module is imported in a fresh interpreter (a cold start, nothing cached in sys.modules) and
+the `-X importtime` log is summarised: the total import time, the slowest top-level packages by
+cumulative time, and how much of it is the script's own module body (agents and clients built at
+import) as opposed to its dependencies.
+
+`--connections N` also measures per-call connection setup: N sequential API calls against a local
+keep-alive HTTP server, made through the shared runtime client and through a new client per call
+(building the client and its SSL context, then a new TCP connection). Over loopback there is no
+DNS or TLS handshake, so the gap to a real endpoint is larger than shown.
+
+    python import_profile.py                          # all agent scripts
+    python import_profile.py guard_rails webhook --top 5
+    python import_profile.py --repeat 5 --json
+    python import_profile.py tri_agent --connections 200
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPTS = [
+    "tri_agent",
+    "guard_rails",
+    "language_traslator",
+    "flight_travel_agent",
+    "dynamic_prompt_chats",
+    "session_demo",
+    "tech_daily_update_agent_ai_generated",
+    "webhook",
+]
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for every line of an `-X importtime` log."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def profile(module: str) -> dict[str, object]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(completed.stderr)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+        return {"module": module, "error": error}
+    # Rows are logged children first, so the module's direct imports are the depth 1 rows between
+    # the previous top-level row (interpreter startup) and the module's own row.
+    index = next(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    start = max((i for i in range(index) if rows[i][3] == 0), default=-1) + 1
+    packages: dict[str, int] = {}
+    for name, _, cumulative_us, depth in rows[start:index]:
+        if depth == 1:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + cumulative_us
+    _, own_us, total_us, _ = rows[index]
+    return {
+        "module": module,
+        "total_ms": total_us / 1000,
+        "own_ms": own_us / 1000,
+        "packages_ms": {name: us / 1000 for name, us in sorted(packages.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def summarise(runs: list[dict[str, object]]) -> dict[str, object]:
+    """Median of repeated cold imports of the same module."""
+    if any("error" in run for run in runs):
+        return next(run for run in runs if "error" in run)
+    packages = {name for run in runs for name in run["packages_ms"]}
+    medians = {
+        name: statistics.median(run["packages_ms"].get(name, 0.0) for run in runs) for name in packages
+    }
+    return {
+        "module": runs[0]["module"],
+        "total_ms": round(statistics.median(run["total_ms"] for run in runs), 1),
+        "own_ms": round(statistics.median(run["own_ms"] for run in runs), 1),
+        "packages_ms": {name: round(ms, 1) for name, ms in sorted(medians.items(), key=lambda kv: -kv[1])},
+    }
+
+
+### CONNECTION SETUP
+
+
+class _ModelsHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 with a Content-Length, so clients can keep the connection open between calls.
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, each response waits for a delayed ACK.
+    disable_nagle_algorithm = True
+    body = json.dumps({"object": "list", "data": []}).encode()
+
+    def setup(self):
+        super().setup()
+        # One handler per TCP connection, however many requests it serves.
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def _time_calls(calls: int, client_for_call) -> list[float]:
+    seconds = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        async with client_for_call() as client:
+            await client.models.list()
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def profile_connections(calls: int) -> list[dict[str, object]]:
+    """Per-call latency and TCP connections opened, shared runtime client vs a new client per call."""
+    from openai import AsyncOpenAI
+
+    import runtime
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ModelsHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    # The local server doesn't check the key; the shared client only needs one to be constructed.
+    os.environ.setdefault("OPENAI_API_KEY", "local")
+    # with_options() keeps the shared client's connection pool.
+    shared = runtime.get_async_client().with_options(base_url=base_url)
+
+    class _Shared:
+        async def __aenter__(self):
+            return shared
+
+        async def __aexit__(self, *exc_info):
+            pass
+
+    results = []
+    try:
+        for label, client_for_call in (
+            ("new client per call", lambda: AsyncOpenAI(base_url=base_url, api_key="local", max_retries=0)),
+            ("shared runtime client", _Shared),
+        ):
+            server.connections = 0
+            seconds = asyncio.run(_time_calls(calls, client_for_call))
+            results.append(
+                {
+                    "client": label,
+                    "calls": calls,
+                    "p50_ms": round(statistics.median(seconds) * 1000, 3),
+                    "mean_ms": round(statistics.fmean(seconds) * 1000, 3),
+                    "connections": server.connections,
+                }
+            )
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=3, help="cold imports per module, the median is reported")
+    parser.add_argument("--top", type=int, default=3, help="slowest packages to list per module")
+    parser.add_argument("--connections", type=int, default=0, help="also time this many calls per client setup")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = [summarise([profile(module) for _ in range(args.repeat)]) for module in args.modules]
+    connections = profile_connections(args.connections) if args.connections else []
+    if args.json:
+        print(json.dumps({"imports": results, "connections": connections} if connections else results, indent=2))
+        return
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']:<40} import failed: {result['error']}")
+            continue
+        top = ", ".join(f"{name} {ms:.0f}" for name, ms in list(result["packages_ms"].items())[: args.top])
+        print(f"{result['module']:<40} {result['total_ms']:>8.1f} ms  own {result['own_ms']:>6.1f} ms  ({top})")
+    for result in connections:
+        print(
+            f"{result['client']:<40} {result['p50_ms']:>8.3f} ms/call p50  mean {result['mean_ms']:.3f} ms"
+            f"  {result['connections']} connections for {result['calls']} calls"
+        )
+
+
+if __name__ == "__main__":
+    main()
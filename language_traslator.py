@@ -1,8 +1,12 @@
 import asyncio
+import uuid
 
 from agents import Agent, ItemHelpers, InputGuardrail, GuardrailFunctionOutput, MessageOutputItem, Runner, trace
 from agents.exceptions import InputGuardrailTripwireTriggered
 from pydantic import BaseModel
+from model_scheduler import Priority, schedule
+from span_metrics import install_from_env
+from usage_ledger import record_usage, tool_output_recorder, usage_turn
 """
 This example shows the agents-as-tools pattern. The frontline agent receives a user message and
 then picks which agents to call, as tools. In this case, it picks from a set of translation
@@ -38,14 +42,17 @@ orchestrator_agent = Agent(
         spanish_agent.as_tool(
             tool_name="translate_to_spanish",
             tool_description="Translate the user's message to Spanish",
+            custom_output_extractor=tool_output_recorder("translate_to_spanish"),
         ),
         french_agent.as_tool(
             tool_name="translate_to_french",
             tool_description="Translate the user's message to French",
+            custom_output_extractor=tool_output_recorder("translate_to_french"),
         ),
         italian_agent.as_tool(
             tool_name="translate_to_italian",
             tool_description="Translate the user's message to Italian",
+            custom_output_extractor=tool_output_recorder("translate_to_italian"),
         ),
     ],
 )
@@ -63,6 +70,7 @@ guardrail_agent = Agent(
 # Only allow questions related to history
 async def translate_guardrail(ctx, agent, input_data):
     result = await Runner.run(guardrail_agent, input_data, context=ctx.context)
+    record_usage(result, stage="guardrail:translate_guardrail")
     final_output = result.final_output_as(TranslationOutput)
     return GuardrailFunctionOutput(
         output_info=final_output,
@@ -77,13 +85,17 @@ synthesizer_agent = Agent(
     ],
 )
 
+schedule(guardrail_agent, priority=Priority.GUARDRAIL)
+schedule(orchestrator_agent, spanish_agent, french_agent, italian_agent, synthesizer_agent)
+
 
 async def main():
+    install_from_env()
     msg = input("Hi! What would you like translated, and to which languages? ")
 
     # Run the entire orchestration in a single trace
-    with trace("Orchestrator evaluator"):
-        orchestrator_result = await Runner.run(orchestrator_agent, msg)
+    with trace("Orchestrator evaluator"), usage_turn(uuid.uuid4().hex[:16]):
+        orchestrator_result = record_usage(await Runner.run(orchestrator_agent, msg))
 
         for item in orchestrator_result.new_items:
             if isinstance(item, MessageOutputItem):
@@ -92,9 +104,9 @@ async def main():
                     print(f"  - Translation step: {text}")
 
         try:
-          synthesizer_result = await Runner.run(
+          synthesizer_result = record_usage(await Runner.run(
               synthesizer_agent, orchestrator_result.to_input_list()
-          )
+          ))
           print(f"\n\nFinal response:\n{synthesizer_result.final_output}")
         except InputGuardrailTripwireTriggered as e:
           print("Guardrail blocked this input:", e)
@@ -0,0 +1,333 @@
+"""
+A local, deterministic stand-in for the OpenAI models used by the agent scripts.
+
+Each agent gets its own MockModel with a script of turns. A turn is the list of output items the
+model "returns" (a message, tool calls or a handoff) after sleeping for a latency sampled from a
+configurable distribution. Nothing leaves the process, so runs can be measured without network noise.
+
+    model = MockModel(
+        "FAQ Agent",
+        turns=[[tool_call("faq_lookup_tool", {"question": "baggage"})], [message("One bag.")]],
+        latency=lognormal(median_ms=40, sigma=0.3),
+    )
+    with use_models([(faq_agent, model)]):
+        result = await Runner.run(faq_agent, "How much baggage can I bring?")
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import json
+import math
+import random
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import Any
+
+import openai
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseStreamEvent,
+    ResponseUsage,
+)
+
+from agents import Agent, Handoff, Model, ModelProvider, ModelResponse, ModelTracing, Usage
+
+### LATENCY
+
+# A latency distribution is a callable that takes a seeded Random and returns seconds.
+Latency = Callable[[random.Random], float]
+
+
+def constant(ms: float) -> Latency:
+    return lambda rng: ms / 1000
+
+
+def uniform(low_ms: float, high_ms: float) -> Latency:
+    return lambda rng: rng.uniform(low_ms, high_ms) / 1000
+
+
+def lognormal(median_ms: float, sigma: float = 0.25) -> Latency:
+    """Long-tailed latency, the usual shape of hosted model calls."""
+    mu = math.log(median_ms)
+    return lambda rng: rng.lognormvariate(mu, sigma) / 1000
+
+
+### OUTPUT ITEMS
+
+
+def message(text: str) -> ResponseOutputMessage:
+    return ResponseOutputMessage(
+        id=f"msg_{uuid.uuid4().hex[:12]}",
+        type="message",
+        role="assistant",
+        status="completed",
+        content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+    )
+
+
+def structured(**fields: Any) -> ResponseOutputMessage:
+    """A message whose text is the JSON of an agent's `output_type`."""
+    return message(json.dumps(fields))
+
+
+def tool_call(name: str, arguments: dict[str, Any] | None = None) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall(
+        id=f"fc_{uuid.uuid4().hex[:12]}",
+        call_id=f"call_{uuid.uuid4().hex[:12]}",
+        type="function_call",
+        name=name,
+        arguments=json.dumps(arguments or {}),
+    )
+
+
+def handoff_call(agent: Agent[Any]) -> ResponseFunctionToolCall:
+    return tool_call(Handoff.default_tool_name(agent))
+
+
+def _fresh(item: ResponseOutputMessage | ResponseFunctionToolCall, prefix: str):
+    # Scripts are reused across runs, so every emitted item needs its own ids. The prefix names the
+    # model and the response that emitted the item, see `MockModel._turn_index`.
+    suffix = uuid.uuid4().hex[:12]
+    if isinstance(item, ResponseFunctionToolCall):
+        return item.model_copy(update={"id": f"fc_{prefix}_{suffix}", "call_id": f"call_{suffix}"})
+    return item.model_copy(update={"id": f"msg_{prefix}_{suffix}"})
+
+
+def _estimate_tokens(value: Any) -> int:
+    # Roughly four characters per token, good enough for relative comparisons.
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return max(1, len(text) // 4)
+
+
+### CALL TIMING
+
+# Runs started inside `measure_calls()` append the observed duration of every mock call here, including
+# those of guardrail and agent-as-tool sub-runs, which copy the context of the task that spawned them.
+_calls: contextvars.ContextVar[list[tuple[str, float]] | None] = contextvars.ContextVar(
+    "mock_model_calls", default=None
+)
+
+
+@contextlib.contextmanager
+def measure_calls() -> Iterator[list[tuple[str, float]]]:
+    """
+    Collect (model name, seconds) for every mock call made inside the block.
+
+    The duration is measured around the simulated sleep, so event loop lag under concurrency shows up.
+    """
+    calls: list[tuple[str, float]] = []
+    token = _calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _calls.reset(token)
+
+
+### RATE LIMITS
+
+
+class _RateLimitedResponse:
+    # Just enough of an HTTP response for openai.RateLimitError, without a transport library.
+    status_code = 429
+    request = None
+
+    def __init__(self, retry_after: float):
+        self.headers = {"retry-after": f"{retry_after:.3f}"}
+
+
+class ProviderLimit:
+    """
+    An account-wide request limit shared by several mock models.
+
+    Requests over `max_requests` in any sliding `per_seconds` window fail with the same
+    `openai.RateLimitError` (HTTP 429, with a retry-after header) the real client raises.
+    """
+
+    def __init__(self, max_requests: int, per_seconds: float = 60.0):
+        self.max_requests = max_requests
+        self.per_seconds = per_seconds
+        self.rejected = 0
+        self._recent: deque[float] = deque()
+
+    def check(self) -> None:
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= self.per_seconds:
+            self._recent.popleft()
+        if len(self._recent) >= self.max_requests:
+            self.rejected += 1
+            retry_after = self.per_seconds - (now - self._recent[0])
+            raise openai.RateLimitError(
+                "Rate limit reached (mock)", response=_RateLimitedResponse(retry_after), body=None
+            )
+        self._recent.append(now)
+
+
+### MODEL
+
+
+class MockModel(Model):
+    def __init__(
+        self,
+        name: str,
+        turns: list[list[Any]],
+        latency: Latency = constant(0),
+        seed: int = 0,
+        limit: ProviderLimit | None = None,
+    ):
+        if not turns:
+            raise ValueError("MockModel needs at least one scripted turn")
+        self.name = name
+        self.turns = turns
+        self.latency = latency
+        self.limit = limit
+        self.calls = 0
+        self._rng = random.Random(seed)
+        # Emitted item ids are "<type>_<tag>-<response number>_<random>", so our own past responses
+        # can be recognised in the input without remembering anything per run.
+        self._tag = uuid.uuid4().hex[:8]
+        self._responses = itertools.count()
+
+    def _turn_index(self, input: str | list[Any]) -> int:
+        # The turn is the number of our own responses since the last user message, however many
+        # items each of them had. This keeps the script stateless per run, so concurrent runs
+        # don't interfere.
+        if isinstance(input, str):
+            return 0
+        marker = f"_{self._tag}-"
+        responses: set[str] = set()
+        for item in input:
+            if not isinstance(item, dict):
+                item = item.model_dump() if hasattr(item, "model_dump") else {}
+            if item.get("role") == "user":
+                responses.clear()
+            elif marker in (item.get("id") or ""):
+                responses.add(item["id"].split(marker, 1)[1].split("_", 1)[0])
+        return min(len(responses), len(self.turns) - 1)
+
+    async def _respond(self, system_instructions: str | None, input: str | list[Any]) -> ModelResponse:
+        if self.limit is not None:
+            self.limit.check()
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        delay = self.latency(self._rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        calls = _calls.get()
+        if calls is not None:
+            calls.append((self.name, loop.time() - started))
+
+        prefix = f"{self._tag}-{next(self._responses)}"
+        output = [_fresh(item, prefix) for item in self.turns[self._turn_index(input)]]
+        input_tokens = _estimate_tokens(system_instructions or "") + _estimate_tokens(input)
+        output_tokens = sum(_estimate_tokens(item.model_dump()) for item in output)
+        return ModelResponse(
+            output=output,
+            usage=Usage(
+                requests=1,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=input_tokens + output_tokens,
+            ),
+            response_id=None,
+        )
+
+    async def get_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[Any],
+        model_settings: Any,
+        tools: list[Any],
+        output_schema: Any,
+        handoffs: list[Any],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any | None = None,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        return await self._respond(system_instructions, input)
+
+    async def stream_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[Any],
+        model_settings: Any,
+        tools: list[Any],
+        output_schema: Any,
+        handoffs: list[Any],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ResponseStreamEvent]:
+        # The whole turn arrives as one completed event, which is all Runner.run_streamed needs.
+        response = await self._respond(system_instructions, input)
+        usage = response.usage
+        yield ResponseCompletedEvent(
+            type="response.completed",
+            sequence_number=0,
+            response=Response(
+                id=f"resp_{uuid.uuid4().hex[:12]}",
+                object="response",
+                created_at=time.time(),
+                model=self.name,
+                output=response.output,
+                parallel_tool_calls=True,
+                tool_choice="auto",
+                tools=[],
+                usage=ResponseUsage(
+                    input_tokens=usage.input_tokens,
+                    input_tokens_details=usage.input_tokens_details,
+                    output_tokens=usage.output_tokens,
+                    output_tokens_details=usage.output_tokens_details,
+                    total_tokens=usage.total_tokens,
+                ),
+            ),
+        )
+
+
+class MockModelProvider(ModelProvider):
+    """Resolves model names to mock models, for use with `RunConfig(model_provider=...)`."""
+
+    def __init__(self, models: dict[str | None, MockModel], default: MockModel | None = None):
+        self.models = models
+        self.default = default
+
+    def get_model(self, model_name: str | None) -> Model:
+        model = self.models.get(model_name, self.default)
+        if model is None:
+            raise KeyError(f"No mock model scripted for {model_name!r}")
+        return model
+
+
+@contextlib.contextmanager
+def use_models(models: list[tuple[Agent[Any], Model]]) -> Iterator[None]:
+    """
+    Temporarily pin a model on each agent.
+
+    Setting `agent.model` (rather than passing a RunConfig) also reaches the nested `Runner.run`
+    calls made inside guardrail functions, which don't receive the caller's run config.
+    """
+    # Agents are unhashable dataclasses, hence pairs rather than a dict.
+    previous = [(agent, agent.model) for agent, _ in models]
+    try:
+        for agent, model in models:
+            agent.model = model
+        yield
+    finally:
+        for agent, model in previous:
+            agent.model = model
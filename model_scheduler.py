@@ -0,0 +1,345 @@
+"""
+Process-wide admission control for model calls.
+
+Every agent wrapped with `schedule()` sends its model calls through one ModelScheduler, which
+  - keeps requests/minute and tokens/minute within budget (token buckets),
+  - admits by priority class, so cheap guardrail and triage calls don't queue behind long
+    generations,
+  - runs at most `max_concurrency` calls at once,
+  - backs off on 429s, pausing all admissions since provider limits are account-wide, and
+    retries connection errors, timeouts, 408/409 and 5xx for the failed call only (the shared
+    client is built without SDK retries, so every failure comes through here),
+  - records how long each call waited in the queue.
+
+Budgets come from AGENT_RPM, AGENT_TPM and AGENT_MAX_CONCURRENCY (see `get_scheduler()`).
+
+    schedule(guardrail_agent, priority=Priority.GUARDRAIL)
+    schedule(triage_agent, priority=Priority.TRIAGE)
+    ...
+    print(get_scheduler().stats.report())
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import contextlib
+import enum
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+import openai
+
+from agents import Agent, Model, ModelResponse, ModelTracing
+from agents.tracing import custom_span
+
+import runtime
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    GUARDRAIL = 0
+    TRIAGE = 1
+    DEFAULT = 2
+    BACKGROUND = 3
+
+
+class _Bucket:
+    """A token bucket refilled continuously at `per_minute / 60` per second."""
+
+    def __init__(self, per_minute: float | None, burst_seconds: float):
+        self.rate = per_minute / 60 if per_minute else None
+        self.capacity = max(1.0, self.rate * burst_seconds) if self.rate else 0.0
+        self.level = self.capacity
+        self.updated: float | None = None
+
+    def _refill(self, now: float) -> None:
+        if self.updated is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        # A request larger than the bucket is admitted once the bucket is full.
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> float:
+        """Charge for an admission, returning what was actually charged."""
+        if self.rate is None:
+            return 0.0
+        charged = min(amount, self.capacity)
+        self.level -= charged
+        return charged
+
+    def adjust(self, amount: float) -> None:
+        # Settles the difference between estimated and actual usage; may leave the bucket in debt.
+        if self.rate is not None:
+            self.level -= amount
+
+
+class SchedulerStats:
+    def __init__(self, window: int = 10_000):
+        self.waits: dict[Priority, deque[float]] = {priority: deque(maxlen=window) for priority in Priority}
+        self.admitted = 0
+        self.rate_limited = 0
+        self.transient_errors = 0
+        self.retries = 0
+
+    def report(self) -> dict[str, Any]:
+        queue_wait = {}
+        for priority, waits in self.waits.items():
+            if not waits:
+                continue
+            ordered = sorted(waits)
+            queue_wait[priority.name.lower()] = {
+                "count": len(ordered),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return {
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "transient_errors": self.transient_errors,
+            "retries": self.retries,
+            "queue_wait": queue_wait,
+        }
+
+
+class ModelScheduler:
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_concurrency: int = 8,
+        burst_seconds: float = 1.0,
+        max_retries: int = 5,
+        base_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats = SchedulerStats()
+        self._requests = _Bucket(requests_per_minute, burst_seconds)
+        self._tokens = _Bucket(tokens_per_minute, burst_seconds)
+        self._queue: list[tuple[int, int, float, asyncio.Future[float]]] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+            if self._active >= self.max_concurrency:
+                return  # `release()` pumps again
+            now = loop.time()
+            wait = max(
+                self._paused_until - now,
+                self._requests.wait_time(1, now),
+                self._tokens.wait_time(tokens, now),
+            )
+            if wait > 0:
+                # Strict priority: lower classes never overtake the head of the queue.
+                self._timer = loop.call_later(wait, self._pump)
+                return
+            heapq.heappop(self._queue)
+            self._requests.take(1)
+            charged = self._tokens.take(tokens)
+            self._active += 1
+            self.stats.admitted += 1
+            future.set_result(charged)
+
+    def release(self) -> None:
+        self._active -= 1
+        self._pump()
+
+    def settle(self, charged_tokens: float, actual_tokens: float) -> None:
+        # Settle against what admission charged, not the estimate: a call estimated above the bucket
+        # size was only charged the bucket size, and the rest is owed here.
+        if actual_tokens and self._tokens.rate is not None:
+            self._tokens.adjust(actual_tokens - charged_tokens)
+
+    def refund(self, charged_tokens: float) -> None:
+        """Return the tokens charged for a call that failed; the retry is charged again on admission."""
+        if charged_tokens and self._tokens.rate is not None:
+            self._tokens.adjust(-charged_tokens)
+
+    def pause(self, seconds: float) -> None:
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        delay = min(self.max_backoff, self.base_backoff * 2**attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay + random.uniform(0, delay * 0.1)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: Priority, tokens: float) -> AsyncIterator[float]:
+        """Wait for admission, yielding the tokens charged for it (for `settle()`), and free the slot on exit."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[float] = loop.create_future()
+        enqueued = loop.time()
+        heapq.heappush(self._queue, (priority, next(self._sequence), tokens, future))
+        self._pump()
+        try:
+            with custom_span("model_scheduler.queue", {"priority": priority.name}):
+                charged = await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # admitted just before being cancelled
+            raise
+        wait = loop.time() - enqueued
+        self.stats.waits[priority].append(wait)
+        try:
+            yield charged
+        finally:
+            self.release()
+
+
+def _estimate_tokens(system_instructions: str | None, input: Any, model_settings: Any) -> int:
+    text = input if isinstance(input, str) else json.dumps(input, default=str)
+    prompt_tokens = (len(system_instructions or "") + len(text)) // 4
+    return prompt_tokens + (getattr(model_settings, "max_tokens", None) or 256)
+
+
+def _transient(error: Exception) -> bool:
+    # What the openai client retries by default, less 429s (handled separately): connection errors
+    # and timeouts, request timeouts, lock conflicts and server errors.
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code in (408, 409) or error.status_code >= 500)
+
+
+def _retry_after(error: openai.APIStatusError) -> float | None:
+    headers = error.response.headers
+    with contextlib.suppress(TypeError, ValueError):
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    return None
+
+
+class ScheduledModel(Model):
+    def __init__(self, model: Model | str | None, scheduler: ModelScheduler, priority: Priority = Priority.DEFAULT):
+        self.scheduler = scheduler
+        self.priority = priority
+        self._model = model
+
+    def _inner(self) -> Model:
+        if not isinstance(self._model, Model):
+            self._model = runtime.get_model(self._model)
+        return self._model
+
+    async def get_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[Any],
+        model_settings: Any,
+        tools: list[Any],
+        output_schema: Any,
+        handoffs: list[Any],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any | None = None,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        estimate = _estimate_tokens(system_instructions, input, model_settings)
+        attempt = 0
+        while True:
+            delay = None
+            async with self.scheduler.slot(self.priority, estimate) as charged:
+                try:
+                    response = await self._inner().get_response(
+                        system_instructions,
+                        input,
+                        model_settings,
+                        tools,
+                        output_schema,
+                        handoffs,
+                        tracing,
+                        previous_response_id=previous_response_id,
+                        conversation_id=conversation_id,
+                        prompt=prompt,
+                        **kwargs,
+                    )
+                except openai.RateLimitError as e:
+                    self.scheduler.stats.rate_limited += 1
+                    self.scheduler.refund(charged)
+                    if attempt >= self.scheduler.max_retries:
+                        raise
+                    delay = self.scheduler.backoff(attempt, _retry_after(e))
+                    logger.warning(f"Rate limited, pausing model calls for {delay:.2f}s")
+                    self.scheduler.pause(delay)
+                    self.scheduler.stats.retries += 1
+                    attempt += 1
+                    continue
+                except openai.APIError as e:
+                    if not _transient(e):
+                        raise
+                    self.scheduler.stats.transient_errors += 1
+                    self.scheduler.refund(charged)
+                    if attempt >= self.scheduler.max_retries:
+                        raise
+                    # Only this call backs off, and not while holding its slot.
+                    retry_after = _retry_after(e) if isinstance(e, openai.APIStatusError) else None
+                    delay = self.scheduler.backoff(attempt, retry_after)
+                    logger.warning(f"Model call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                    self.scheduler.stats.retries += 1
+                    attempt += 1
+            if delay is not None:
+                await asyncio.sleep(delay)
+                continue
+            self.scheduler.settle(charged, response.usage.total_tokens)
+            return response
+
+    def stream_response(self, *args: Any, **kwargs: Any):
+        # Streams are not admission controlled, they bypass the scheduler.
+        return self._inner().stream_response(*args, **kwargs)
+
+
+_scheduler: ModelScheduler | None = None
+
+
+def get_scheduler() -> ModelScheduler:
+    """The process-wide scheduler, created on first use from AGENT_RPM, AGENT_TPM and AGENT_MAX_CONCURRENCY."""
+    global _scheduler
+    if _scheduler is None:
+        rpm = os.getenv("AGENT_RPM")
+        tpm = os.getenv("AGENT_TPM")
+        _scheduler = ModelScheduler(
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            max_concurrency=int(os.getenv("AGENT_MAX_CONCURRENCY", "8")),
+        )
+    return _scheduler
+
+
+def schedule(*agents: Agent[Any], priority: Priority = Priority.DEFAULT, scheduler: ModelScheduler | None = None) -> None:
+    """Route the model calls of these agents through the (process-wide by default) scheduler."""
+    for agent in agents:
+        if not isinstance(agent.model, ScheduledModel):
+            agent.model = ScheduledModel(agent.model, scheduler or get_scheduler(), priority)
@@ -0,0 +1,156 @@
+"""
+Persona instructions for dynamic_prompt_chats.py, loaded from personas.json.
+
+Each persona is one line, "Only respond as the anime character ... from anime tv show ...", the
+same wording the old if/elif chain returned. Instructions are built once per style when the file is
+loaded; a run only does a dict lookup. Add a persona by adding an entry to "personas" in
+personas.json, no code changes needed.
+
+These prompts are about 45 tokens, far below the 1024 tokens from which providers cache a prompt
+prefix, so no layout of them gets any cached tokens; the registry is about data-driven personas,
+not caching. An optional "shared_prefix" in personas.json is put before every persona line, for
+instructions that really apply to all personas.
+
+    python persona_registry.py --sessions 5000 --extra-personas 50   # build time, prompt and cached tokens
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import json
+import os
+import random
+import time
+
+PERSONAS_FILE = os.getenv(
+    "PERSONAS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "personas.json")
+)
+
+
+class PersonaRegistry:
+    def __init__(
+        self, persona_template: str, personas: dict[str, dict[str, str]], default: str, shared_prefix: str = ""
+    ):
+        if default not in personas:
+            raise ValueError(f"Default persona {default!r} is not defined")
+        self.persona_template = persona_template
+        self.personas = personas
+        self.default = default
+        self.shared_prefix = shared_prefix
+        self._instructions = {
+            style: "\n".join(filter(None, (shared_prefix, persona_template.format(**fields))))
+            for style, fields in personas.items()
+        }
+        self._default_instructions = self._instructions[default]
+
+    @classmethod
+    def load(cls, path: str = PERSONAS_FILE) -> PersonaRegistry:
+        with open(path) as f:
+            data = json.load(f)
+        prefix = data.get("shared_prefix", "")
+        return cls(
+            persona_template=data["persona_template"],
+            personas=data["personas"],
+            default=data["default"],
+            shared_prefix="\n".join(prefix) if isinstance(prefix, list) else prefix,
+        )
+
+    @property
+    def styles(self) -> list[str]:
+        return list(self._instructions)
+
+    def instructions(self, style: str) -> str:
+        # Unknown styles fall back to the default persona, like the old `else` branch did.
+        return self._instructions.get(style, self._default_instructions)
+
+
+### MEASUREMENT
+
+# Provider prompt caching, approximately: a prompt reuses the longest prefix seen within the last
+# few minutes, in 128-token steps from 1024 tokens. Tokens are estimated at four characters each.
+_CACHE_MIN_TOKENS = 1024
+_CACHE_STEP_TOKENS = 128
+
+
+def _legacy_instructions(style: str) -> str:
+    # The if/elif chain dynamic_prompt_chats.py used before the registry, kept for comparison.
+    if style == "goku":
+        return "Only respond as the anime character goku from anime tv show Dragon Ball Z."
+    elif style == "luffy":
+        return "Only respond as the anime character luffy from anime tv show One Piece."
+    else:
+        return "Only respond as the anime character naruto from anime tv show Naruto."
+
+
+def _cached_tokens(prompt: str, now: float, last_used: dict[int, float], ttl: float) -> int:
+    """Tokens a provider prefix cache would serve for `prompt` at `now`, then refresh its prefixes."""
+    total = len(prompt) // 4
+    cached = 0
+    for tokens in range(_CACHE_MIN_TOKENS, total + 1, _CACHE_STEP_TOKENS):
+        key = hash(prompt[: tokens * 4])
+        if now - last_used.get(key, float("-inf")) <= ttl:
+            cached = tokens
+        last_used[key] = now
+    return cached
+
+
+def measure(
+    build,
+    styles: list[str],
+    user_message: str,
+    sessions: int,
+    sessions_per_minute: float = 10,
+    ttl_minutes: float = 5,
+    seed: int = 0,
+) -> dict[str, float]:
+    rng = random.Random(seed)
+    last_used: dict[int, float] = {}
+    build_ns = 0
+    prompt_tokens = 0
+    cached_tokens = 0
+    for session in range(sessions):
+        style = rng.choice(styles)
+        started = time.perf_counter_ns()
+        instructions = build(style)
+        build_ns += time.perf_counter_ns() - started
+        prompt = f"{instructions}\n{user_message}"
+        prompt_tokens += len(prompt) // 4
+        cached_tokens += _cached_tokens(prompt, session / sessions_per_minute, last_used, ttl_minutes)
+    return {
+        "build_ns_per_session": build_ns / sessions,
+        "prompt_tokens_per_session": prompt_tokens / sessions,
+        "cached_token_ratio": cached_tokens / prompt_tokens,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--sessions-per-minute", type=float, default=10)
+    parser.add_argument("--ttl-minutes", type=float, default=5, help="how long the provider keeps a cached prefix")
+    parser.add_argument("--extra-personas", type=int, default=0, help="synthetic personas added to personas.json")
+    args = parser.parse_args()
+
+    registry = PersonaRegistry.load()
+    if args.extra_personas:
+        extra = {f"extra_{i}": {"character": f"character {i}", "show": f"show {i}"} for i in range(args.extra_personas)}
+        registry = PersonaRegistry(
+            registry.persona_template, {**registry.personas, **extra}, registry.default, registry.shared_prefix
+        )
+    user_message = "Tell whats your name and what do you do in your daily life. Also tell how fight a bad person in your own way."
+    for label, build, styles in (
+        ("if/elif (before)", _legacy_instructions, ["goku", "luffy", "naruto"]),
+        ("registry", registry.instructions, registry.styles),
+    ):
+        result = measure(
+            build, styles, user_message, args.sessions, args.sessions_per_minute, args.ttl_minutes
+        )
+        print(
+            f"{label:<18} build {result['build_ns_per_session']:>7.0f} ns/session"
+            f"  prompt {result['prompt_tokens_per_session']:>6.0f} tokens"
+            f"  cached {result['cached_token_ratio']:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
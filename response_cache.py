@@ -0,0 +1,251 @@
+"""
+Record/replay cache for model responses.
+
+Many of our calls are repeated with identical inputs (the fixed question in `tri_agent_main`,
+the fixed `user_message` in dynamic_prompt_chats.py, FAQ questions). CachingModel wraps an agent's
+model and keys each response on the agent name, the model name it resolves to, the resolved
+instructions, the tools and handoffs offered, the model settings, the output schema and the input.
+Only model calls are cached: tools and handoff hooks still run, so side effects like `update_seat`
+behave the same on a hit.
+
+Modes:
+  - "auto": serve from the cache, call the model on a miss and store the response
+  - "record": always call the model and overwrite the stored response
+  - "replay": never call the model, a miss raises CacheMiss (fully offline)
+
+Every lookup is wrapped in a `response_cache.hit` / `response_cache.miss` custom span, so hits
+show up in traces and in span_metrics histograms.
+
+    cache = ResponseCache(".agent_cache", mode="auto")
+    cache.enable(triage_agent, history_tutor_agent, math_tutor_agent)
+
+Or, from the scripts that call `enable_from_env()`:
+
+    AGENT_CACHE_MODE=replay python tri_agent.py
+"""
+
+from __future__ import annotations as _annotations
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Literal
+
+from openai.types.responses import ResponseOutputItem
+from pydantic import TypeAdapter
+
+from agents import Agent, Model, ModelResponse, ModelTracing, Usage
+from agents.tracing import custom_span
+
+import runtime
+
+logger = logging.getLogger(__name__)
+
+CacheMode = Literal["auto", "record", "replay"]
+
+DEFAULT_CACHE_DIR = ".agent_cache"
+
+_output_items = TypeAdapter(list[ResponseOutputItem])
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when no response was recorded for a request."""
+
+
+def _plain(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_unset=True)
+    return value
+
+
+def _input_signature(input: str | list[Any]) -> Any:
+    if isinstance(input, str):
+        return input
+    items = []
+    call_ids: dict[str, str] = {}
+    for item in input:
+        item = dict(_plain(item))
+        # Item ids are assigned per response and carry no meaning for the model.
+        item.pop("id", None)
+        # Neither do call ids (e.g. of triage's handoff call), beyond pairing a call with its
+        # output, so they are renumbered in input order.
+        if "call_id" in item:
+            item["call_id"] = call_ids.setdefault(item["call_id"], f"call_{len(call_ids)}")
+        items.append(item)
+    return items
+
+
+def _tool_signature(tool: Any) -> Any:
+    return [tool.name, getattr(tool, "params_json_schema", None)]
+
+
+def cache_key(
+    agent_name: str,
+    model: str | None,
+    system_instructions: str | None,
+    input: str | list[Any],
+    model_settings: Any,
+    tools: list[Any],
+    output_schema: Any,
+    handoffs: list[Any],
+) -> str:
+    request = {
+        "agent": agent_name,
+        "model": model,
+        "instructions": system_instructions,
+        "input": _input_signature(input),
+        "model_settings": model_settings.to_json_dict() if model_settings is not None else None,
+        "tools": [_tool_signature(tool) for tool in tools],
+        "handoffs": [[handoff.tool_name, handoff.input_json_schema] for handoff in handoffs],
+        "output_schema": (
+            None
+            if output_schema is None or output_schema.is_plain_text()
+            else [output_schema.name(), output_schema.json_schema()]
+        ),
+    }
+    encoded = json.dumps(request, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseCache:
+    """An in-memory LRU in front of a directory of JSON files, one per recorded response."""
+
+    def __init__(self, path: str | None = DEFAULT_CACHE_DIR, mode: CacheMode = "auto", maxsize: int = 1024):
+        if mode not in ("auto", "record", "replay"):
+            raise ValueError(f"Unknown cache mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, ModelResponse] = OrderedDict()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def _remember(self, key: str, response: ModelResponse) -> None:
+        # Nothing is spent on a hit, so hits report empty usage whether they come from memory or disk.
+        response = ModelResponse(output=response.output, usage=Usage(), response_id=None)
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> ModelResponse | None:
+        response = self._memory.get(key)
+        if response is not None:
+            self._memory.move_to_end(key)
+            return response
+        if not self.path or not os.path.exists(self._file(key)):
+            return None
+        with open(self._file(key)) as f:
+            stored = json.load(f)
+        response = ModelResponse(output=_output_items.validate_python(stored["output"]), usage=Usage(), response_id=None)
+        self._remember(key, response)
+        return self._memory[key]
+
+    def put(self, key: str, response: ModelResponse) -> None:
+        self._remember(key, response)
+        if not self.path:
+            return
+        stored = {
+            "output": [item.model_dump(mode="json", exclude_unset=True) for item in response.output],
+            "usage": {
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens,
+                "total_tokens": response.usage.total_tokens,
+            },
+        }
+        # Write then rename, so a concurrent reader never sees a half-written file.
+        tmp = f"{self._file(key)}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(stored, f)
+        os.replace(tmp, self._file(key))
+
+    def enable(self, *agents: Agent[Any]) -> None:
+        """Route the model calls of these agents through this cache."""
+        for agent in agents:
+            if not isinstance(agent.model, CachingModel):
+                agent.model = CachingModel(agent.name, agent.model, self)
+
+
+class CachingModel(Model):
+    def __init__(self, agent_name: str, model: Model | str | None, cache: ResponseCache):
+        self.agent_name = agent_name
+        self.cache = cache
+        # Named models are resolved on the first miss, so replay mode never needs an API key.
+        self._model = model
+
+    def _inner(self) -> Model:
+        if not isinstance(self._model, Model):
+            self._model = runtime.get_model(self._model)
+        return self._model
+
+    async def get_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[Any],
+        model_settings: Any,
+        tools: list[Any],
+        output_schema: Any,
+        handoffs: list[Any],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any | None = None,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        # Switching an agent's model (or OPENAI_DEFAULT_MODEL) must not replay the old model's responses.
+        model = runtime.resolved_model_name(self._model)
+        key = cache_key(
+            self.agent_name, model, system_instructions, input, model_settings, tools, output_schema, handoffs
+        )
+        cached = None if self.cache.mode == "record" else self.cache.get(key)
+        if cached is not None:
+            self.cache.hits += 1
+            with custom_span("response_cache.hit", {"agent": self.agent_name, "key": key[:16]}):
+                return cached
+
+        self.cache.misses += 1
+        if self.cache.mode == "replay":
+            raise CacheMiss(f"No recorded response for {self.agent_name} (key {key[:16]})")
+        with custom_span("response_cache.miss", {"agent": self.agent_name, "key": key[:16]}):
+            response = await self._inner().get_response(
+                system_instructions,
+                input,
+                model_settings,
+                tools,
+                output_schema,
+                handoffs,
+                tracing,
+                previous_response_id=previous_response_id,
+                conversation_id=conversation_id,
+                prompt=prompt,
+                **kwargs,
+            )
+        self.cache.put(key, response)
+        return response
+
+    def stream_response(self, *args: Any, **kwargs: Any):
+        # Streaming is not cached, pass it straight through.
+        return self._inner().stream_response(*args, **kwargs)
+
+
+def enable_from_env(*agents: Agent[Any]) -> ResponseCache | None:
+    """
+    Cache the given agents when AGENT_CACHE_MODE is set to auto, record or replay.
+
+    AGENT_CACHE_DIR overrides the on-disk location (default .agent_cache).
+    """
+    mode = os.getenv("AGENT_CACHE_MODE")
+    if not mode:
+        return None
+    cache = ResponseCache(os.getenv("AGENT_CACHE_DIR", DEFAULT_CACHE_DIR), mode=mode)
+    cache.enable(*agents)
+    logger.info(f"Response cache enabled in {mode} mode for {', '.join(agent.name for agent in agents)}")
+    return cache
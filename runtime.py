@@ -0,0 +1,101 @@
+"""
+Shared process-wide runtime for the agent scripts.
+
+- One lazily created, keep-alive pooled AsyncOpenAI client (and a sync one for the webhook
+  scripts). It is also installed as the Agents SDK default client, so every model call reuses
+  the same connection pool instead of each provider opening its own.
+- One model provider, used by the CachingModel and ScheduledModel wrappers.
+
+Nothing here touches the network or needs an API key until the first call.
+
+    from runtime import get_async_client, get_model
+    model = get_model("gpt-4o-mini")
+"""
+
+from __future__ import annotations as _annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+    from agents import Model
+
+# Keep idle connections around between agent turns; httpx closes them after 5 seconds by default.
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "120"))
+
+_lock = threading.Lock()
+_async_client: AsyncOpenAI | None = None
+_client: OpenAI | None = None
+_provider = None
+
+
+def _limits():
+    from openai import DEFAULT_CONNECTION_LIMITS
+
+    # Built with the Limits class of the HTTP library the installed openai package uses.
+    return type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            from agents import set_default_openai_client
+
+            # No SDK retries: a 429 has to reach ScheduledModel at once, so it can pause all admissions
+            # instead of being retried while holding a scheduler slot. ScheduledModel also retries the
+            # transient errors the SDK would have (connection errors, timeouts, 408, 409, 5xx).
+            _async_client = AsyncOpenAI(max_retries=0, http_client=DefaultAsyncHttpxClient(limits=_limits()))
+            set_default_openai_client(_async_client)
+    return _async_client
+
+
+def get_client() -> OpenAI:
+    """The sync client, for Flask handlers and one-off scripts. Picks up OPENAI_WEBHOOK_SECRET if set."""
+    global _client
+    with _lock:
+        if _client is None:
+            from openai import DefaultHttpxClient, OpenAI
+
+            _client = OpenAI(
+                webhook_secret=os.getenv("OPENAI_WEBHOOK_SECRET"),
+                http_client=DefaultHttpxClient(limits=_limits()),
+            )
+    return _client
+
+
+def get_model(model_name: str | None) -> Model:
+    """Resolve a model name through one shared provider backed by the shared client."""
+    global _provider
+    get_async_client()
+    with _lock:
+        if _provider is None:
+            from agents.models.multi_provider import MultiProvider
+
+            _provider = MultiProvider()
+    return _provider.get_model(model_name)
+
+
+def resolved_model_name(model: Model | str | None) -> str | None:
+    """The name of the model calls are sent to, looking through CachingModel/ScheduledModel wrappers."""
+    while hasattr(model, "_model"):
+        model = model._model
+    if model is None:
+        from agents.models import get_default_model
+
+        return get_default_model()
+    if isinstance(model, str):
+        return model
+    name = getattr(model, "model", None)
+    return name if isinstance(name, str) else type(model).__name__
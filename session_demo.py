@@ -1,6 +1,8 @@
 import asyncio
 
 from agents import Agent, Runner, SQLiteSession
+from model_scheduler import schedule
+from usage_ledger import record_usage, usage_turn
 
 async def main():
     # Create agent
@@ -8,32 +10,36 @@ async def main():
         name="Assistant",
         instructions="Reply very concisely about the mentioned topic.",
     )
+    schedule(agent)
 
     # Create a session instance with a session ID
     session = SQLiteSession("steve_ferns_96","conversations.db")
 
     # First turn
-    result = await Runner.run(
-        agent,
-        "Which anime is monkey de luffy from ?",
-        session=session
-    )
+    with usage_turn(session.session_id):
+        result = record_usage(await Runner.run(
+            agent,
+            "Which anime is monkey de luffy from ?",
+            session=session
+        ))
     print(result.final_output)  # "San Francisco"
 
     # Second turn - agent automatically remembers previous context
-    result = await Runner.run(
-        agent,
-        "Who is he in the show?",
-        session=session
-    )
+    with usage_turn(session.session_id):
+        result = record_usage(await Runner.run(
+            agent,
+            "Who is he in the show?",
+            session=session
+        ))
     print(result.final_output)  # "California"
 
     # Also works with synchronous runner
-    result = await Runner.run(
-        agent,
-        "What episode is it currently airing?",
-        session=session
-    )
+    with usage_turn(session.session_id):
+        result = record_usage(await Runner.run(
+            agent,
+            "What episode is it currently airing?",
+            session=session
+        ))
     print(result.final_output) 
     # "Approximately 39 million"
 
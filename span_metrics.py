@@ -0,0 +1,337 @@
+"""
+Local span metrics for agent runs.
+
+`trace("Customer service", ...)` and friends only reach the hosted dashboard. SpanMetricsProcessor
+is an extra trace processor that keeps the duration (and token usage, where the span carries it)
+of every agent, tool, handoff, guardrail and model span in an in-process ring buffer, and turns
+it into p50/p95/p99 histograms that can be scraped as Prometheus text or appended to a rolling
+JSONL file. Quantiles cover the spans still in the buffer; counts, sums, errors and tokens are
+running totals since start, so Prometheus `rate()` works on them.
+
+Tokens are counted once per model call: on the response/generation span where the model reports
+them, or on the enclosing turn span when it doesn't (e.g. custom models). Task spans repeat the
+sum of their turns and are never counted, so the token counter can be summed across kinds.
+
+    processor = install(sample_rate=0.1)
+    serve_prometheus(processor, port=9464)       # GET http://localhost:9464/metrics
+    JsonlExporter(processor, "agent_metrics.jsonl").start()
+
+Or, without code changes in the scripts that call `install_from_env()`:
+
+    AGENT_METRICS_PORT=9464 AGENT_METRICS_SAMPLE_RATE=0.1 python flight_travel_agent.py
+"""
+
+from __future__ import annotations as _annotations
+
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, NamedTuple
+
+from agents import add_trace_processor
+from agents.tracing import Span, Trace, TracingProcessor
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_MODEL_CALL_KINDS = ("generation", "response")
+
+
+class SpanRecord(NamedTuple):
+    kind: str
+    name: str
+    agent: str | None
+    seconds: float
+    input_tokens: int
+    output_tokens: int
+    error: bool
+    ended_at: float
+
+
+def _span_name(span_data: Any) -> str:
+    kind = span_data.type
+    if kind == "handoff":
+        return f"{span_data.from_agent} -> {span_data.to_agent}"
+    if kind == "generation":
+        return span_data.model or "generation"
+    if kind == "response":
+        response = span_data.response
+        return getattr(response, "model", None) or "response"
+    return getattr(span_data, "name", None) or kind
+
+
+def _span_usage(span_data: Any) -> tuple[int, int]:
+    usage = getattr(span_data, "usage", None)
+    if usage is None and span_data.type == "response" and span_data.response is not None:
+        usage = span_data.response.usage
+    if usage is None:
+        return 0, 0
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+    return int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+
+
+def _quantile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SpanMetricsProcessor(TracingProcessor):
+    """
+    Records span timings into a bounded ring buffer.
+
+    Sampling is decided once per trace, so a sampled trace is always complete. Unsampled traces
+    cost one set lookup per span.
+    """
+
+    def __init__(self, capacity: int = 10_000, sample_rate: float = 1.0, seed: int | None = None):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.records: deque[SpanRecord] = deque(maxlen=capacity)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sampled_traces: set[str] = set()
+        # span_id -> (start time, owning agent name, kind, parent span_id)
+        self._open_spans: dict[str, tuple[float, str | None, str, str | None]] = {}
+        # Open turn spans whose model calls already reported their tokens.
+        self._counted_turns: set[str] = set()
+        # (kind, name, agent) -> [count, seconds, errors, input tokens, output tokens], never evicted
+        self._totals: dict[tuple[str, str, str | None], list[float]] = {}
+
+    def on_trace_start(self, trace: Trace) -> None:
+        if self.sample_rate >= 1 or self._rng.random() < self.sample_rate:
+            self._sampled_traces.add(trace.trace_id)
+
+    def on_trace_end(self, trace: Trace) -> None:
+        self._sampled_traces.discard(trace.trace_id)
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        if span.trace_id not in self._sampled_traces:
+            return
+        # Model and tool spans are attributed to the agent span they run under.
+        if span.span_data.type == "agent":
+            agent = span.span_data.name
+        else:
+            parent = self._open_spans.get(span.parent_id) if span.parent_id else None
+            agent = parent[1] if parent else None
+        self._open_spans[span.span_id] = (time.perf_counter(), agent, span.span_data.type, span.parent_id)
+
+    def _enclosing_turn(self, span_id: str | None) -> str | None:
+        while span_id is not None:
+            opened = self._open_spans.get(span_id)
+            if opened is None:
+                return None
+            if opened[2] == "turn":
+                return span_id
+            span_id = opened[3]
+        return None
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        opened = self._open_spans.pop(span.span_id, None)
+        if opened is None:
+            return
+        started, agent, kind, parent_id = opened
+        span_data = span.span_data
+        input_tokens, output_tokens = _span_usage(span_data)
+        if kind == "task":
+            input_tokens = output_tokens = 0
+        elif kind in _MODEL_CALL_KINDS and (input_tokens or output_tokens):
+            turn = self._enclosing_turn(parent_id)
+            if turn is not None:
+                self._counted_turns.add(turn)
+        elif kind == "turn" and span.span_id in self._counted_turns:
+            self._counted_turns.discard(span.span_id)
+            input_tokens = output_tokens = 0
+        record = SpanRecord(
+            kind=span_data.type,
+            name=_span_name(span_data),
+            agent=agent,
+            seconds=time.perf_counter() - started,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            error=span.error is not None,
+            ended_at=time.time(),
+        )
+        key = (record.kind, record.name, record.agent)
+        with self._lock:
+            self.records.append(record)
+            totals = self._totals.setdefault(key, [0, 0.0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += record.seconds
+            totals[2] += record.error
+            totals[3] += input_tokens
+            totals[4] += output_tokens
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """
+        One histogram per (kind, name, agent): running totals since start, and quantiles over the
+        buffered spans (None once all of a group's spans have been evicted).
+        """
+        with self._lock:
+            records = list(self.records)
+            totals = {key: list(values) for key, values in self._totals.items()}
+
+        durations: dict[tuple[str, str, str | None], list[float]] = defaultdict(list)
+        for record in records:
+            durations[(record.kind, record.name, record.agent)].append(record.seconds)
+
+        histograms = []
+        for key in sorted(totals, key=lambda key: (key[0], key[1], key[2] or "")):
+            kind, name, agent = key
+            count, seconds, errors, input_tokens, output_tokens = totals[key]
+            ordered = sorted(durations.get(key, ()))
+            histograms.append(
+                {
+                    "kind": kind,
+                    "name": name,
+                    "agent": agent,
+                    "count": int(count),
+                    "sum_s": seconds,
+                    **{f"p{int(q * 100)}_s": _quantile(ordered, q) if ordered else None for q in QUANTILES},
+                    "errors": int(errors),
+                    "input_tokens": int(input_tokens),
+                    "output_tokens": int(output_tokens),
+                }
+            )
+        return histograms
+
+
+### EXPORT
+
+
+def _label(value: str | None) -> str:
+    return (value or "").replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(processor: SpanMetricsProcessor) -> str:
+    lines = [
+        "# HELP agent_span_seconds Duration of agent run spans; quantiles over the local ring buffer.",
+        "# TYPE agent_span_seconds summary",
+    ]
+    token_lines = [
+        "# HELP agent_span_tokens_total Model tokens since start, each counted once (on response/generation spans, else turn spans).",
+        "# TYPE agent_span_tokens_total counter",
+    ]
+    for histogram in processor.snapshot():
+        labels = (
+            f'kind="{_label(histogram["kind"])}",name="{_label(histogram["name"])}",'
+            f'agent="{_label(histogram["agent"])}"'
+        )
+        for q in QUANTILES:
+            if histogram[f"p{int(q * 100)}_s"] is None:
+                continue
+            lines.append(f'agent_span_seconds{{{labels},quantile="{q}"}} {histogram[f"p{int(q * 100)}_s"]:.6f}')
+        lines.append(f"agent_span_seconds_sum{{{labels}}} {histogram['sum_s']:.6f}")
+        lines.append(f"agent_span_seconds_count{{{labels}}} {histogram['count']}")
+        if histogram["input_tokens"] or histogram["output_tokens"]:
+            token_lines.append(f'agent_span_tokens_total{{{labels},direction="input"}} {histogram["input_tokens"]}')
+            token_lines.append(f'agent_span_tokens_total{{{labels},direction="output"}} {histogram["output_tokens"]}')
+    return "\n".join(lines + token_lines) + "\n"
+
+
+def serve_prometheus(processor: SpanMetricsProcessor, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `/metrics` from a daemon thread. Call `.shutdown()` on the returned server to stop it."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(processor).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="span-metrics-http", daemon=True).start()
+    logger.info(f"Serving agent span metrics on http://{host}:{port}/metrics")
+    return server
+
+
+class JsonlExporter:
+    """Appends a snapshot line every `interval` seconds, rotating the file once it reaches `max_bytes`."""
+
+    def __init__(
+        self,
+        processor: SpanMetricsProcessor,
+        path: str,
+        interval: float = 60.0,
+        max_bytes: int = 10 * 1024 * 1024,
+    ):
+        self.processor = processor
+        self.path = path
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def write(self) -> None:
+        line = json.dumps({"ts": time.time(), "histograms": self.processor.snapshot()})
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.error(f"Error writing span metrics: {e}")
+
+    def start(self) -> JsonlExporter:
+        self._thread = threading.Thread(target=self._loop, name="span-metrics-jsonl", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+
+def install(capacity: int = 10_000, sample_rate: float = 1.0) -> SpanMetricsProcessor:
+    """Register a SpanMetricsProcessor next to the default (hosted dashboard) processor."""
+    processor = SpanMetricsProcessor(capacity=capacity, sample_rate=sample_rate)
+    add_trace_processor(processor)
+    return processor
+
+
+def install_from_env() -> SpanMetricsProcessor | None:
+    """
+    Set up local metrics from AGENT_METRICS_PORT and/or AGENT_METRICS_JSONL.
+
+    Does nothing when neither is set. AGENT_METRICS_SAMPLE_RATE (default 1.0) and
+    AGENT_METRICS_INTERVAL (seconds between JSONL lines, default 60) are optional.
+    """
+    port = os.getenv("AGENT_METRICS_PORT")
+    jsonl_path = os.getenv("AGENT_METRICS_JSONL")
+    if not port and not jsonl_path:
+        return None
+    processor = install(sample_rate=float(os.getenv("AGENT_METRICS_SAMPLE_RATE", "1.0")))
+    if port:
+        serve_prometheus(processor, int(port))
+    if jsonl_path:
+        exporter = JsonlExporter(processor, jsonl_path, interval=float(os.getenv("AGENT_METRICS_INTERVAL", "60")))
+        atexit.register(exporter.stop)
+        exporter.start()
+    return processor
@@ -0,0 +1,259 @@
+"""
+Speculative handoffs: start the likely specialist while triage is still deciding.
+
+A triage turn normally costs a triage model call, then the specialist's calls, one after the
+other. `run_speculative()` guesses the specialist up front (with a cheap local `predict`), runs it
+on the same input in a background task, and runs triage as usual. When the real run hands off to
+the guessed specialist, its model calls are answered with the speculative responses, already
+finished or still in flight. When triage picks another agent, or answers itself, the speculation
+is cancelled and the real run calls the model as it always did.
+
+The speculative run never has side effects: it stops right after the first response that calls a
+tool not listed in `safe_tools`, or hands off, and leaves executing that call to the real run.
+Responses the real run used are in its result; the others are recorded in the usage ledger as
+stage "speculative:<agent>".
+
+    speculate(triage_agent, faq_agent, seat_booking_agent, safe_tools=["faq_lookup_tool"])
+    stats = SpeculationStats()
+    result = await run_speculative(triage_agent, input_items, predict, context=context, stats=stats)
+    print(stats.report())
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import contextvars
+import copy
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from agents import Agent, Model, ModelResponse, ModelTracing, RunResult, Runner
+from agents.tracing import custom_span
+
+import runtime
+from usage_ledger import record_responses
+
+logger = logging.getLogger(__name__)
+
+
+class _SpeculationStop(Exception):
+    """Ends a speculative run before it executes a tool call or handoff with side effects."""
+
+
+class SpeculationStats:
+    def __init__(self):
+        self.turns = 0
+        self.speculated = 0
+        self.hits = 0
+        self.served = 0
+        self.wasted_calls = 0
+        self.wasted_tokens = 0
+        self.saved_seconds = 0.0
+
+    def add(self, speculation: Speculation) -> None:
+        self.speculated += 1
+        if speculation.served:
+            self.hits += 1
+        self.served += speculation.served
+        unused = speculation.responses[speculation.served :]
+        self.wasted_calls += len(unused)
+        self.wasted_tokens += sum(response.usage.total_tokens for response in unused)
+        self.saved_seconds += speculation.saved_seconds
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "speculated": self.speculated,
+            "hits": self.hits,
+            "misses": self.speculated - self.hits,
+            "hit_rate": round(self.hits / self.speculated, 3) if self.speculated else None,
+            "served_calls": self.served,
+            "wasted_calls": self.wasted_calls,
+            "wasted_tokens": self.wasted_tokens,
+            "saved_ms": round(self.saved_seconds * 1000, 1),
+            "saved_ms_per_hit": round(self.saved_seconds * 1000 / self.hits, 1) if self.hits else None,
+        }
+
+
+class Speculation:
+    """The responses of one speculative run, handed to the real run in order."""
+
+    def __init__(self, agent_name: str, source_name: str):
+        self.agent_name = agent_name
+        self.source_name = source_name
+        self.responses: list[ModelResponse] = []
+        self.served = 0
+        self.saved_seconds = 0.0
+        self.task: asyncio.Task[None] | None = None
+        self._futures: list[asyncio.Future[tuple[ModelResponse, float] | None]] = []
+        self._closed = False
+
+    def _future(self, index: int) -> asyncio.Future[tuple[ModelResponse, float] | None]:
+        loop = asyncio.get_running_loop()
+        while len(self._futures) <= index:
+            future = loop.create_future()
+            if self._closed:
+                future.set_result(None)
+            self._futures.append(future)
+        return self._futures[index]
+
+    def publish(self, response: ModelResponse, seconds: float) -> None:
+        future = self._future(len(self.responses))
+        self.responses.append(response)
+        if not future.done():
+            future.set_result((response, seconds))
+
+    async def serve(self) -> ModelResponse | None:
+        """The next speculative response, or None once the speculation has nothing more to offer."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # Shielded: if the real run is cancelled, the speculative one is cancelled by close() instead.
+        published = await asyncio.shield(self._future(self.served))
+        if published is None:
+            return None
+        response, seconds = published
+        self.served += 1
+        # The call would have taken `seconds` from now; we only waited for what was left of it.
+        self.saved_seconds += max(0.0, seconds - (loop.time() - started))
+        return response
+
+    def close(self) -> None:
+        self._closed = True
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        for future in self._futures:
+            if not future.done():
+                future.set_result(None)
+
+
+# Set in the real run's context, and (separately) in the speculative run's task.
+_serving: contextvars.ContextVar[Speculation | None] = contextvars.ContextVar("speculation_serving", default=None)
+_recording: contextvars.ContextVar[Speculation | None] = contextvars.ContextVar(
+    "speculation_recording", default=None
+)
+
+
+class SpeculativeModel(Model):
+    def __init__(self, agent_name: str, model: Model | str | None, safe_tools: Iterable[str] = ()):
+        self.agent_name = agent_name
+        self.safe_tools = frozenset(safe_tools)
+        self._model = model
+
+    def _inner(self) -> Model:
+        if not isinstance(self._model, Model):
+            self._model = runtime.get_model(self._model)
+        return self._model
+
+    async def get_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[Any],
+        model_settings: Any,
+        tools: list[Any],
+        output_schema: Any,
+        handoffs: list[Any],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any | None = None,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        def call() -> Any:
+            return self._inner().get_response(
+                system_instructions,
+                input,
+                model_settings,
+                tools,
+                output_schema,
+                handoffs,
+                tracing,
+                previous_response_id=previous_response_id,
+                conversation_id=conversation_id,
+                prompt=prompt,
+                **kwargs,
+            )
+
+        recording = _recording.get()
+        if recording is not None:
+            return await self._record(recording, call)
+
+        speculation = _serving.get()
+        if speculation is not None:
+            if self.agent_name == speculation.agent_name:
+                response = await speculation.serve()
+                if response is not None:
+                    return response
+            elif self.agent_name != speculation.source_name or speculation.served:
+                # Triage handed off elsewhere, or the specialist handed back: nothing left to use.
+                speculation.close()
+        return await call()
+
+    async def _record(self, speculation: Speculation, call: Callable[[], Any]) -> ModelResponse:
+        if self.agent_name != speculation.agent_name:
+            raise _SpeculationStop(f"speculative run left {speculation.agent_name}")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        response = await call()
+        speculation.publish(response, loop.time() - started)
+        calls = [item.name for item in response.output if getattr(item, "type", None) == "function_call"]
+        if any(name not in self.safe_tools for name in calls):
+            raise _SpeculationStop(f"{', '.join(calls)} must run in the real run")
+        return response
+
+    def stream_response(self, *args: Any, **kwargs: Any):
+        # Streamed runs are never speculated.
+        return self._inner().stream_response(*args, **kwargs)
+
+
+def speculate(*agents: Agent[Any], safe_tools: Iterable[str] = ()) -> None:
+    """Let these agents take part in speculative runs; a plain pass-through otherwise."""
+    for agent in agents:
+        if not isinstance(agent.model, SpeculativeModel):
+            agent.model = SpeculativeModel(agent.name, agent.model, safe_tools)
+
+
+async def _speculative_run(speculation: Speculation, agent: Agent[Any], input: Any, context: Any) -> None:
+    _recording.set(speculation)
+    try:
+        with custom_span("speculative_handoff", {"agent": agent.name}):
+            await Runner.run(agent, input, context=context)
+    except Exception as e:
+        # Stopped before a side effect, or failed; either way the real run falls back to the model.
+        logger.debug(f"Speculative run of {agent.name} ended: {e}")
+    finally:
+        speculation.close()
+
+
+async def run_speculative(
+    starting_agent: Agent[Any],
+    input: str | list[Any],
+    predict: Callable[[str | list[Any]], Agent[Any] | None],
+    *,
+    context: Any = None,
+    stats: SpeculationStats | None = None,
+    **kwargs: Any,
+) -> RunResult:
+    """`Runner.run`, with the specialist `predict` picks started alongside `starting_agent`."""
+    if stats is not None:
+        stats.turns += 1
+    specialist = predict(input)
+    if specialist is None:
+        return await Runner.run(starting_agent, input, context=context, **kwargs)
+
+    speculation = Speculation(specialist.name, starting_agent.name)
+    # The speculative run gets its own copy of the context and input; it must not touch the real ones.
+    speculation.task = asyncio.create_task(
+        _speculative_run(speculation, specialist, copy.deepcopy(input), copy.deepcopy(context))
+    )
+    token = _serving.set(speculation)
+    try:
+        return await Runner.run(starting_agent, input, context=context, **kwargs)
+    finally:
+        _serving.reset(token)
+        speculation.close()
+        if stats is not None:
+            stats.add(speculation)
+        # The served responses are in the real run's result; the rest were paid for all the same.
+        record_responses(speculation.responses[speculation.served :], specialist, f"speculative:{specialist.name}")
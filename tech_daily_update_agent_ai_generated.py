@@ -1,12 +1,14 @@
 import os
 import asyncio
-import feedparser
 import aiosmtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import openai
 import logging
 
+from rss_stream import fetch_entries
+from runtime import get_async_client
+from usage_ledger import record_completion
+
 # Configuration
 RSS_FEED_URL = "https://www.smashingmagazine.com/feed/"  # Working frontend dev news RSS feed
 SMTP_SERVER = "smtp.gmail.com"
@@ -15,25 +17,15 @@ EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")  # Set your email in environment vari
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")  # Set your app password in environment variable
 RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")  # Set recipient email in environment variable
 
-# OpenAI API key from environment variable
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai.api_key = OPENAI_API_KEY
+# The shared OpenAI client reads OPENAI_API_KEY from the environment
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 async def fetch_frontend_news():
     try:
-        feed = await asyncio.to_thread(feedparser.parse, RSS_FEED_URL)
-        news_items = []
-        for entry in feed.entries[:5]:  # Get top 5 news items
-            item = {
-                "title": entry.title,
-                "link": entry.link,
-                "summary": entry.summary if 'summary' in entry else ''
-            }
-            news_items.append(item)
-        return news_items
+        # Streams the feed and stops reading after the top 5 news items
+        return await asyncio.to_thread(fetch_entries, RSS_FEED_URL, 5)
     except Exception as e:
         logger.error(f"Error fetching RSS feed: {e}")
         return []
@@ -48,7 +40,8 @@ async def generate_html_from_ai(news_items):
     prompt += "Return only the HTML code without any explanations."
 
     try:
-        response = await openai.ChatCompletion.acreate(
+        # Not behind the scheduler, so keep the SDK's own retries for this call.
+        response = await get_async_client().with_options(max_retries=2).chat.completions.create(
             model="gpt-4.1-mini",
             messages=[
                 {"role": "system", "content": "You are an expert HTML developer."},
@@ -57,6 +50,7 @@ async def generate_html_from_ai(news_items):
             max_tokens=500,
             temperature=0.7,
         )
+        record_completion(response, agent="digest_html")
         html_content = response.choices[0].message.content.strip()
         return html_content
     except Exception as e:
@@ -1,12 +1,13 @@
 import os
 import asyncio
-import feedparser
 import aiosmtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from openai_agents import Agent
 import logging
 
+from rss_stream import fetch_entries
+
 # Configuration
 RSS_FEED_URL = "https://www.smashingmagazine.com/feed/"  # Working frontend dev news RSS feed
 SMTP_SERVER = "smtp.gmail.com"
@@ -24,16 +25,8 @@ logger = logging.getLogger(__name__)
 async def fetch_frontend_news():
     """Fetch frontend development news from RSS feed"""
     try:
-        feed = await asyncio.to_thread(feedparser.parse, RSS_FEED_URL)
-        news_items = []
-        for entry in feed.entries[:5]:  # Get top 5 news items
-            item = {
-                "title": entry.title,
-                "link": entry.link,
-                "summary": entry.summary if 'summary' in entry else ''
-            }
-            news_items.append(item)
-        return news_items
+        # Streams the feed and stops reading after the top 5 news items
+        return await asyncio.to_thread(fetch_entries, RSS_FEED_URL, 5)
     except Exception as e:
         logger.error(f"Error fetching RSS feed: {e}")
         return []
@@ -11,6 +11,9 @@
 
 import asyncio
 from agents import Agent, Runner
+from model_scheduler import Priority, schedule
+from response_cache import enable_from_env
+from usage_ledger import record_usage
 
 history_tutor_agent = Agent(
     name="History Tutor",
@@ -30,8 +33,12 @@ triage_agent = Agent(
     handoffs=[history_tutor_agent, math_tutor_agent]
 )
 
+schedule(triage_agent, priority=Priority.TRIAGE)
+schedule(history_tutor_agent, math_tutor_agent)
+
 async def tri_agent_main():
-    result = await Runner.run(triage_agent, "What is the capital of France?")
+    enable_from_env(triage_agent, history_tutor_agent, math_tutor_agent)
+    result = record_usage(await Runner.run(triage_agent, "What is the capital of France?"))
     print(result.final_output)
 
 if __name__ == "__main__":
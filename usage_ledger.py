@@ -0,0 +1,343 @@
+"""
+Token and cost accounting for agent runs, kept in a local SQLite table.
+
+Every `Runner.run` result handed to `record_usage()` adds one row per model response, attributed to
+  - the conversation and turn it belongs to (`usage_turn()`),
+  - the agent that produced the response,
+  - the stage it ran in: "run" for the script's own runs, "guardrail:<name>" or "tool:<name>"
+    for the nested runs inside guardrails and agents-as-tools, "speculative:<agent>" for the
+    discarded responses of speculative handoffs,
+  - the tools and handoffs the response called.
+
+Recording is off unless AGENT_USAGE_DB is set, so the calls in the scripts cost nothing by default.
+
+    AGENT_USAGE_DB=agent_usage.db python flight_travel_agent.py
+    python usage_ledger.py agent_usage.db                 # top consumers and tokens-per-turn growth
+    python usage_ledger.py agent_usage.db --by stage --top 5
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import contextlib
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from typing import Any
+
+import runtime
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (input, cached input, output). Models not listed are reported without a cost.
+PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    ts INTEGER NOT NULL,
+    conversation TEXT,
+    turn INTEGER,
+    agent TEXT NOT NULL,
+    model TEXT,
+    stage TEXT NOT NULL,
+    tools TEXT,
+    input_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_conversation ON usage (conversation, turn);
+"""
+
+_Row = tuple[int, str | None, int | None, str, str | None, str, str | None, int, int, int]
+
+
+def cost(model: str | None, input_tokens: int, cached_tokens: int, output_tokens: int) -> float | None:
+    prices = PRICES.get(model or "")
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    return (
+        (input_tokens - cached_tokens) * input_price + cached_tokens * cached_price + output_tokens * output_price
+    ) / 1_000_000
+
+
+def model_name(agent: Any) -> str | None:
+    """The model an agent's calls went to, looking through CachingModel/ScheduledModel wrappers."""
+    return runtime.resolved_model_name(agent.model)
+
+
+class UsageLedger:
+    def __init__(self, path: str = "agent_usage.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        # conversation -> last turn started in this process
+        self._turns: dict[str, int] = {}
+
+    def next_turn(self, conversation: str) -> int:
+        with self._lock:
+            turn = self._turns.get(conversation)
+            if turn is None:
+                # Continue numbering when a conversation spans processes (e.g. a persisted session).
+                row = self._connection.execute(
+                    "SELECT MAX(turn) FROM usage WHERE conversation = ?", (conversation,)
+                ).fetchone()
+                turn = row[0] or 0
+            self._turns[conversation] = turn + 1
+            return turn + 1
+
+    def add(self, rows: list[_Row]) -> None:
+        if not rows:
+            return
+        with self._lock:
+            self._connection.executemany("INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_ledger: UsageLedger | None = None
+_ledger_loaded = False
+_turn: contextvars.ContextVar[tuple[str, int] | None] = contextvars.ContextVar("usage_turn", default=None)
+
+
+def get_ledger() -> UsageLedger | None:
+    """The process-wide ledger, opened on first use from AGENT_USAGE_DB, or None when accounting is off."""
+    global _ledger, _ledger_loaded
+    if not _ledger_loaded:
+        _ledger_loaded = True
+        path = os.getenv("AGENT_USAGE_DB")
+        if path:
+            _ledger = UsageLedger(path)
+    return _ledger
+
+
+def set_ledger(ledger: UsageLedger | None) -> None:
+    global _ledger, _ledger_loaded
+    _ledger, _ledger_loaded = ledger, True
+
+
+@contextlib.contextmanager
+def usage_turn(conversation: str) -> Iterator[int]:
+    """Attribute everything recorded inside, including nested guardrail and tool runs, to the next turn."""
+    ledger = get_ledger()
+    turn = ledger.next_turn(conversation) if ledger is not None else 0
+    token = _turn.set((conversation, turn))
+    try:
+        yield turn
+    finally:
+        _turn.reset(token)
+
+
+def _row(response: Any, agent: Any, stage: str) -> _Row:
+    conversation, turn = _turn.get() or (None, None)
+    tools = [item.name for item in response.output if getattr(item, "type", None) == "function_call"]
+    usage = response.usage
+    details = getattr(usage, "input_tokens_details", None)
+    return (
+        int(time.time()),
+        conversation,
+        turn,
+        agent.name,
+        model_name(agent),
+        stage,
+        ",".join(tools) or None,
+        usage.input_tokens,
+        getattr(details, "cached_tokens", 0) or 0,
+        usage.output_tokens,
+    )
+
+
+def _rows(result: Any, stage: str) -> list[_Row]:
+    # Output items are shared with `new_items`, which know the agent that produced them.
+    agents = {id(item.raw_item): item.agent for item in result.new_items}
+    agent = result.last_agent
+    rows = []
+    for response in result.raw_responses:
+        agent = next((agents[id(item)] for item in response.output if id(item) in agents), agent)
+        rows.append(_row(response, agent, stage))
+    return rows
+
+
+def _add(rows: list[_Row]) -> None:
+    ledger = get_ledger()
+    if ledger is not None:
+        try:
+            ledger.add(rows)
+        except sqlite3.Error as e:
+            # Accounting must never break a conversation.
+            logger.warning(f"Could not record usage: {e}")
+
+
+def record_usage(result: Any, stage: str = "run") -> Any:
+    """Record the model usage of a `Runner.run` result. Returns the result, so it can wrap the call."""
+    if get_ledger() is not None:
+        _add(_rows(result, stage))
+    return result
+
+
+def record_responses(responses: list[Any], agent: Any, stage: str) -> None:
+    """Record model responses of `agent` that no `Runner.run` result carries, e.g. discarded speculative ones."""
+    if get_ledger() is not None:
+        _add([_row(response, agent, stage) for response in responses])
+
+
+def tool_output_recorder(tool_name: str):
+    """A `custom_output_extractor` for `Agent.as_tool` that records the sub-agent's run as `tool:<name>`."""
+
+    async def extract(result: Any) -> Any:
+        record_usage(result, stage=f"tool:{tool_name}")
+        return result.final_output
+
+    return extract
+
+
+def record_completion(response: Any, agent: str, stage: str = "run") -> Any:
+    """Record a Chat Completions response, for scripts that call the client directly."""
+    usage = getattr(response, "usage", None)
+    if get_ledger() is not None and usage is not None:
+        conversation, turn = _turn.get() or (None, None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        row = (
+            int(time.time()),
+            conversation,
+            turn,
+            agent,
+            response.model,
+            stage,
+            None,
+            usage.prompt_tokens,
+            getattr(details, "cached_tokens", 0) or 0,
+            usage.completion_tokens,
+        )
+        _add([row])
+    return response
+
+
+### REPORT
+
+
+def top_consumers(connection: sqlite3.Connection, by: str, top: int) -> list[dict[str, Any]]:
+    column = {"agent": "agent", "stage": "stage", "conversation": "conversation", "model": "model", "tools": "tools"}[by]
+    totals: dict[Any, dict[str, Any]] = defaultdict(
+        lambda: {"responses": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+    )
+    query = f"""
+        SELECT {column}, model, COUNT(*), SUM(input_tokens), SUM(cached_tokens), SUM(output_tokens)
+        FROM usage GROUP BY {column}, model
+    """
+    for key, model, responses, input_tokens, cached_tokens, output_tokens in connection.execute(query):
+        entry = totals[key]
+        entry["responses"] += responses
+        entry["input_tokens"] += input_tokens
+        entry["cached_tokens"] += cached_tokens
+        entry["output_tokens"] += output_tokens
+        price = cost(model, input_tokens, cached_tokens, output_tokens)
+        if price is None:
+            entry["unpriced"] = True
+        else:
+            entry["cost_usd"] += price
+    ranked = sorted(totals.items(), key=lambda kv: -(kv[1]["input_tokens"] + kv[1]["output_tokens"]))
+    return [{by: key, **entry} for key, entry in ranked[:top]]
+
+
+def turn_growth(connection: sqlite3.Connection, max_turns: int) -> list[dict[str, Any]]:
+    """Mean tokens per turn by turn number: how fast resent history grows a conversation's prompts."""
+    query = """
+        SELECT turn, COUNT(*), AVG(input_tokens), AVG(output_tokens) FROM (
+            SELECT conversation, turn, SUM(input_tokens) AS input_tokens, SUM(output_tokens) AS output_tokens
+            FROM usage WHERE conversation IS NOT NULL AND turn <= ? GROUP BY conversation, turn
+        ) GROUP BY turn ORDER BY turn
+    """
+    rows = connection.execute(query, (max_turns,)).fetchall()
+    first = rows[0][2] if rows else 0
+    return [
+        {
+            "turn": turn,
+            "conversations": conversations,
+            "input_tokens": round(input_tokens),
+            "output_tokens": round(output_tokens),
+            "growth": round(input_tokens / first, 2) if first else None,
+        }
+        for turn, conversations, input_tokens, output_tokens in rows
+    ]
+
+
+def daily_tokens_per_turn(connection: sqlite3.Connection, days: int) -> list[dict[str, Any]]:
+    query = """
+        SELECT day, COUNT(*), AVG(tokens) FROM (
+            SELECT date(MIN(ts), 'unixepoch') AS day, SUM(input_tokens + output_tokens) AS tokens
+            FROM usage WHERE conversation IS NOT NULL GROUP BY conversation, turn
+        ) GROUP BY day ORDER BY day DESC LIMIT ?
+    """
+    return [
+        {"day": day, "turns": turns, "tokens_per_turn": round(tokens)}
+        for day, turns, tokens in connection.execute(query, (days,))
+    ][::-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db", nargs="?", default=os.getenv("AGENT_USAGE_DB", "agent_usage.db"))
+    parser.add_argument(
+        "--by",
+        choices=["agent", "stage", "conversation", "model", "tools"],
+        default="agent",
+        help="tools groups responses by the tools they called, e.g. 'faq_lookup_tool,update_seat';"
+        " the cost of each agent-as-tool run is in --by stage, as tool:<name>",
+    )
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=10, help="turn numbers to show in the growth table")
+    parser.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist, run a script with AGENT_USAGE_DB={args.db} first")
+    connection = sqlite3.connect(args.db)
+
+    if args.by == "tools":
+        print(f"Top {args.top} by the tools the responses called")
+    else:
+        print(f"Top {args.top} by {args.by}")
+    for entry in top_consumers(connection, args.by, args.top):
+        # "+" marks a lower bound: some of the responses went to models missing from PRICES.
+        if entry.get("unpriced") and not entry["cost_usd"]:
+            price = "n/a"
+        else:
+            price = f"${entry['cost_usd']:.4f}" + ("+" if entry.get("unpriced") else "")
+        print(
+            f"  {str(entry[args.by] or '-'):<36} {entry['responses']:>6} responses  in {entry['input_tokens']:>9}"
+            f" (cached {entry['cached_tokens']:>8})  out {entry['output_tokens']:>8}  {price:>10}"
+        )
+
+    growth = turn_growth(connection, args.turns)
+    if growth:
+        print("\nTokens per turn")
+        for entry in growth:
+            print(
+                f"  turn {entry['turn']:>3}  {entry['conversations']:>5} conversations  in {entry['input_tokens']:>8}"
+                f"  out {entry['output_tokens']:>6}  x{entry['growth']}"
+            )
+        print("\nTokens per turn by day")
+        for entry in daily_tokens_per_turn(connection, args.days):
+            print(f"  {entry['day']}  {entry['turns']:>6} turns  {entry['tokens_per_turn']:>8} tokens/turn")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
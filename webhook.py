@@ -1,15 +1,20 @@
 
 import os
-from openai import OpenAI, InvalidWebhookSignatureError
+from openai import InvalidWebhookSignatureError
 from flask import Flask, request, Response
+from runtime import get_client
 
 app = Flask(__name__)
-client = OpenAI(webhook_secret=os.environ["OPENAI_WEBHOOK_SECRET"])
+# Without the secret every delivery would fail to verify, so refuse to start instead
+if not os.getenv("OPENAI_WEBHOOK_SECRET"):
+    raise RuntimeError("OPENAI_WEBHOOK_SECRET must be set to verify webhook signatures")
+# Shared, pooled client (reads OPENAI_WEBHOOK_SECRET)
+client = get_client()
 
 @app.route("/webhook", methods=["POST"])
 def webhook():
     try:
-        # with webhook_secret set above, unwrap will raise an error if the signature is invalid
+        # with webhook_secret set on the client, unwrap will raise an error if the signature is invalid
         event = client.webhooks.unwrap(request.data, request.headers)
 
         if event.type == "response.completed":
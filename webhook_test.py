@@ -1,6 +1,6 @@
-from openai import OpenAI
+from runtime import get_client
 
-client = OpenAI()
+client = get_client()
 
 resp = client.responses.create(
   model="4o-mini",